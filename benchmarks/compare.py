@@ -0,0 +1,75 @@
+"""Compare two benchmark result files and flag significant changes.
+
+A benchmark counts as a regression when it got slower by more than
+--threshold AND Welch's t-test on the raw samples gives p < --alpha, so noise
+on a busy machine is not reported as a regression. Exits with status 1 if any
+regression is found.
+
+    python benchmarks/compare.py results/base.json results/new.json
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from stats import welch_t_test
+
+
+def load(path: Path):
+    data = json.loads(path.read_text())
+    return data, data["benchmarks"]
+
+
+def relative_change(a, b) -> float:
+    """Relative change of the mean time (positive = slower)"""
+    mean_a = sum(a) / len(a)
+    return (sum(b) / len(b)) / mean_a - 1 if mean_a else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--alpha", type=float, default=0.01, help="significance level")
+    parser.add_argument("--threshold", type=float, default=0.05, help="minimum relative change to report")
+    args = parser.parse_args()
+
+    base_run, base = load(args.base)
+    new_run, new = load(args.new)
+    if base_run["machine"]["id"] != new_run["machine"]["id"]:
+        print(f"⚠️ Runs come from different machines ({base_run['machine']['cpu']} vs {new_run['machine']['cpu']});"
+              " timings are not directly comparable")
+    if base_run["machine"]["packages"] != new_run["machine"]["packages"]:
+        print(f"⚠️ Package versions differ: {base_run['machine']['packages']} vs {new_run['machine']['packages']}")
+
+    print(f"\n{'benchmark':<40}{'base ms':>10}{'new ms':>10}{'change':>9}{'p':>9}  verdict")
+    regressions = []
+    for name in sorted(set(base) | set(new)):
+        if name not in base or name not in new:
+            print(f"{name:<40}{'':>38}  only in {'new' if name in new else 'base'}")
+            continue
+        a, b = base[name]["samples"], new[name]["samples"]
+        change = relative_change(a, b)
+        if len(a) < 2 or len(b) < 2:
+            p = float("nan")
+            verdict = "too few samples"
+        else:
+            _, _, p = welch_t_test(a, b)
+            significant = p < args.alpha and abs(change) > args.threshold
+            verdict = "REGRESSION" if significant and change > 0 else "improved" if significant else "~"
+        if verdict == "REGRESSION":
+            regressions.append(name)
+        print(
+            f"{name:<40}{base[name]['mean_s'] * 1000:>10.2f}{new[name]['mean_s'] * 1000:>10.2f}"
+            f"{change * 100:>+8.1f}%{p:>9.4f}  {verdict}"
+        )
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} significant regression(s): {', '.join(regressions)}")
+        return 1
+    print("\n✅ No significant regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Run the offline benchmark suite and store the results as JSON.
+
+Needs no network or GPU. Benchmarks whose dependencies are not installed are
+recorded as skipped. Compare two result files with compare.py.
+
+    python benchmarks/run.py --repeat 15
+    python benchmarks/run.py --suite format_output --suite format_dataset
+"""
+import argparse
+import gc
+import hashlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from stats import mean_stdev
+from suites import BENCHMARKS, ROOT
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+RESULTS_VERSION = 1
+
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def memory_gb() -> float:
+    try:
+        with open("/proc/meminfo") as f:
+            return int(f.readline().split()[1]) / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def package_versions():
+    versions = {}
+    for name in ("torch", "transformers", "tokenizers", "bs4", "numpy"):
+        try:
+            versions[name] = getattr(__import__(name), "__version__", "unknown")
+        except ImportError:
+            versions[name] = None
+    return versions
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def machine_fingerprint():
+    """What the timings depend on; compare.py warns when two runs differ here"""
+    machine = {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpu": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "memory_gb": round(memory_gb(), 1),
+        "packages": package_versions(),
+    }
+    hardware = json.dumps({k: machine[k] for k in ("cpu", "cpu_count", "memory_gb", "platform")}, sort_keys=True)
+    machine["id"] = hashlib.sha256(hardware.encode()).hexdigest()[:12]
+    return machine
+
+
+def measure(setup, repeat: int, warmup: int):
+    run, work, unit, *cleanup = setup()
+    try:
+        for _ in range(warmup):
+            run()
+        samples = []
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            run()
+            samples.append(time.perf_counter() - start)
+    finally:
+        for callback in cleanup:
+            callback()
+    mean, stdev = mean_stdev(samples)
+    median = sorted(samples)[len(samples) // 2]
+    return {
+        "unit": unit,
+        "work": work,
+        "samples": samples,
+        "mean_s": mean,
+        "stdev_s": stdev,
+        "median_s": median,
+        "throughput": work / median if median else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", action="append", help="run only these suites (repeatable)")
+    parser.add_argument("--filter", default="", help="run only benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--out", type=Path, help=f"default: {RESULTS_DIR}/<timestamp>-<machine>.json")
+    args = parser.parse_args()
+
+    machine = machine_fingerprint()
+    results = {}
+    skipped = {}
+    for name, (suite, setup) in BENCHMARKS.items():
+        if (args.suite and suite not in args.suite) or args.filter not in name:
+            continue
+        try:
+            result = measure(setup, args.repeat, args.warmup)
+        except ImportError as e:
+            skipped[name] = f"missing dependency: {e.name}"
+            print(f"⚠️ {name:<40} skipped ({skipped[name]})")
+            continue
+        results[name] = result
+        print(
+            f"📊 {name:<40} median {result['median_s'] * 1000:>9.2f} ms "
+            f"± {result['stdev_s'] * 1000:>7.2f}  {result['throughput']:>12.1f} {result['unit']}/s"
+        )
+
+    created = datetime.now(timezone.utc)
+    out = args.out or RESULTS_DIR / f"{created:%Y%m%d-%H%M%S}-{machine['id']}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "version": RESULTS_VERSION,
+        "created": created.isoformat(),
+        "commit": git_commit(),
+        "machine": machine,
+        "config": {"repeat": args.repeat, "warmup": args.warmup},
+        "benchmarks": results,
+        "skipped": skipped,
+    }, indent=2))
+    print(f"\n✅ {len(results)} benchmarks ({len(skipped)} skipped) saved to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import math
+from typing import List, Tuple
+
+
+def mean_stdev(samples: List[float]) -> Tuple[float, float]:
+    n = len(samples)
+    mean = sum(samples) / n
+    if n < 2:
+        return mean, 0.0
+    return mean, math.sqrt(sum((x - mean) ** 2 for x in samples) / (n - 1))
+
+
+def _betacf(a: float, b: float, x: float) -> float:
+    """Continued fraction for the regularised incomplete beta function (modified Lentz)"""
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1, a - 1
+    c, d = 1.0, 1 - qab * x / qap
+    d = 1 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 300):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1 + aa * d
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = 1 + aa / c if abs(1 + aa / c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1 + aa * d
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = 1 + aa / c if abs(1 + aa / c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-12:
+            break
+    return h
+
+
+def betainc(a: float, b: float, x: float) -> float:
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1 - front * _betacf(b, a, 1 - x) / b
+
+
+def welch_t_test(a: List[float], b: List[float]) -> Tuple[float, float, float]:
+    """Two-sided Welch's t-test; returns (t, degrees of freedom, p-value)"""
+    mean_a, sd_a = mean_stdev(a)
+    mean_b, sd_b = mean_stdev(b)
+    var_a, var_b = sd_a ** 2 / len(a), sd_b ** 2 / len(b)
+    if var_a + var_b == 0:
+        return (0.0, 0.0, 1.0) if mean_a == mean_b else (math.copysign(math.inf, mean_b - mean_a), 0.0, 0.0)
+
+    t = (mean_b - mean_a) / math.sqrt(var_a + var_b)
+    df = (var_a + var_b) ** 2 / (
+        (var_a ** 2 / (len(a) - 1) if len(a) > 1 else 0) + (var_b ** 2 / (len(b) - 1) if len(b) > 1 else 0)
+    )
+    p = betainc(df / 2, 0.5, df / (df + t * t))
+    return t, df, p
@@ -0,0 +1,274 @@
+"""Benchmark definitions.
+
+Each benchmark is a setup function returning ``(run, work, unit)``: ``run`` does
+one timed iteration that processes ``work`` units. Setup cost is not timed. A
+fourth element, if present, is a cleanup callback called after measuring.
+Everything runs offline: scrapers get saved HTML through a fake session,
+format_dataset runs in a temporary working directory, and the model
+benchmarks use the tiny random LLaMA model.
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+COLLECTION_SCRIPTS = ROOT / "data/collection_scripts"
+RAW_DATA = COLLECTION_SCRIPTS / "data/raw"
+sys.path[:0] = [str(COLLECTION_SCRIPTS), str(ROOT / "inference")]
+
+BENCHMARKS: Dict[str, Tuple[str, Callable]] = {}
+
+
+def benchmark(suite: str, name: str):
+    def register(setup: Callable):
+        BENCHMARKS[f"{suite}/{name}"] = (suite, setup)
+        return setup
+    return register
+
+
+@contextlib.contextmanager
+def quiet():
+    """The pipeline scripts print per item; keep that out of the timings"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def raw_items():
+    items = json.loads((RAW_DATA / "aceternity.json").read_text(encoding="utf-8"))
+    return items + json.loads((RAW_DATA / "magicui_full.json").read_text(encoding="utf-8"))
+
+
+# --------------------------
+# Scrapers
+# --------------------------
+
+class FakeResponse:
+    def __init__(self, text: str, status_code: int = 200):
+        self.text = text
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """Stands in for requests.Session, serving fixtures by component name (last URL segment)"""
+
+    def __init__(self, pages: Dict[str, str]):
+        self.pages = pages
+        self.headers = {}
+
+    def get(self, url: str, timeout: float = None) -> FakeResponse:
+        page = self.pages.get(url.rstrip("/").rsplit("/", 1)[-1])
+        return FakeResponse(page) if page is not None else FakeResponse("", 404)
+
+    def head(self, url: str, timeout: float = None) -> FakeResponse:
+        return FakeResponse("", 200 if url.rstrip("/").rsplit("/", 1)[-1] in self.pages else 404)
+
+
+def fixture_pages(source: str) -> Dict[str, str]:
+    return {
+        path.stem[len(source) + 1:]: path.read_text(encoding="utf-8")
+        for path in sorted(FIXTURES.glob(f"{source}-*.html"))
+    }
+
+
+def scraper_benchmarks(source: str, module: str, class_name: str):
+    rounds = 20
+
+    @benchmark("scrapers", f"{source}_parse_extract")
+    def parse_extract():
+        from bs4 import BeautifulSoup
+
+        scraper = getattr(__import__(module), class_name)()
+        pages = list(fixture_pages(source).values())
+
+        def run():
+            for _ in range(rounds):
+                for page in pages:
+                    scraper.extract_code_content(BeautifulSoup(page, "html.parser"))
+        return run, rounds * len(pages), "pages"
+
+    @benchmark("scrapers", f"{source}_scrape_component")
+    def scrape_component():
+        scraper = getattr(__import__(module), class_name)()
+        pages = fixture_pages(source)
+        scraper.session = FakeSession(pages)
+
+        def run():
+            with quiet():
+                for _ in range(rounds):
+                    for name in pages:
+                        scraper.scrape_component(name)
+        return run, rounds * len(pages), "components"
+
+
+scraper_benchmarks("aceternity", "scrape_aceternity", "AceternityComponentScraper")
+scraper_benchmarks("magicui", "scrape_magicui", "MagicUIComponentScraper")
+
+
+# --------------------------
+# format_dataset
+# --------------------------
+
+def renamed(item: Dict, i: int) -> Dict:
+    """Copy of a registry item under a unique name, with its file paths following along"""
+    old, new = item["name"], f"{item['name']}-{i}"
+    files = [
+        {**file, **{key: file[key].replace(f"/{old}.", f"/{new}.") for key in ("path", "target") if key in file}}
+        for file in item["files"]
+    ]
+    return {**item, "name": new, "files": files}
+
+
+def synthetic_raw_corpus(size: int, seed: int = 0):
+    """Clone scraped items under new names, split across both raw file layouts"""
+    rng = random.Random(seed)
+    base = raw_items()
+    items = []
+    for i in range(size):
+        record = dict(rng.choice(base))
+        record["completion"] = json.dumps(renamed(json.loads(record["completion"]), i), indent=2)
+        items.append(record)
+    half = size // 2
+    return items[:half], {"components": items[half:]}
+
+
+for size in (100, 1000, 10000):
+    @benchmark("format_dataset", f"items_{size}")
+    def format_dataset_bench(size=size):
+        from format_dataset import format_dataset
+
+        tmp = tempfile.TemporaryDirectory(prefix="bench-format-dataset-")
+        workdir = tmp.name
+        raw_dir = Path(workdir) / "data/raw"
+        raw_dir.mkdir(parents=True)
+        aceternity, magicui = synthetic_raw_corpus(size)
+        (raw_dir / "aceternity.json").write_text(json.dumps(aceternity), encoding="utf-8")
+        (raw_dir / "magicui_full.json").write_text(json.dumps(magicui), encoding="utf-8")
+
+        def run():
+            # format_dataset reads and writes relative to the working directory
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                with quiet():
+                    format_dataset()
+            finally:
+                os.chdir(cwd)
+        return run, size, "items", tmp.cleanup
+
+
+# --------------------------
+# format_output
+# --------------------------
+
+def malformed_variants(completion: str, rng: random.Random):
+    yield "truncated", completion[: int(len(completion) * rng.uniform(0.3, 0.95))]
+    yield "chatter", f"Sure! Here is the component:\n```json\n{completion}\n```\nLet me know if you need changes."
+    yield "trailing_comma", completion.replace('"\n  }', '",\n  }').replace("}\n  ]", "},\n  ]")
+    yield "unclosed", completion.rstrip().rstrip("}").rstrip().rstrip("]")
+
+
+def format_output_cases(kind: str, count: int = 200, seed: int = 0):
+    rng = random.Random(seed)
+    completions = [record["completion"] for record in raw_items()]
+    cases = []
+    while len(cases) < count:
+        completion = rng.choice(completions)
+        if kind == "valid":
+            cases.append(completion)
+        else:
+            cases.extend(text for _, text in malformed_variants(completion, rng))
+    return cases[:count]
+
+
+for kind in ("valid", "malformed"):
+    @benchmark("format_output", kind)
+    def format_output_bench(kind=kind):
+        from json_repair import format_output
+
+        cases = format_output_cases(kind)
+
+        def run():
+            for text in cases:
+                format_output(text)
+        return run, len(cases), "outputs"
+
+
+# --------------------------
+# Registry validator
+# --------------------------
+
+@benchmark("validator", "validate_batch")
+def validate_batch_bench():
+    from bench_validator import synthetic_items
+    from registry_validator import RegistryValidator
+
+    items = synthetic_items(10000, 0.1, random.Random(0))
+    validator = RegistryValidator()
+
+    def run():
+        validator.validate_batch(items)
+    return run, len(items), "items"
+
+
+@benchmark("validator", "jsonschema")
+def jsonschema_bench():
+    from jsonschema import Draft7Validator
+
+    from bench_validator import synthetic_items
+    from registry_validator import REGISTRY_ITEM_SCHEMA
+
+    items = synthetic_items(10000, 0.1, random.Random(0))
+    validator = Draft7Validator(REGISTRY_ITEM_SCHEMA)
+
+    def run():
+        for item in items:
+            list(validator.iter_errors(item))
+    return run, len(items), "items"
+
+
+# --------------------------
+# Tiny model
+# --------------------------
+
+@benchmark("model", "tokenize")
+def tokenize_bench():
+    from tiny_model import build_tiny_model, load_corpus_texts
+
+    _, tokenizer = build_tiny_model()
+    texts = load_corpus_texts()
+    tokens = sum(len(ids) for ids in tokenizer(texts)["input_ids"])
+
+    def run():
+        tokenizer(texts)
+    return run, tokens, "tokens"
+
+
+@benchmark("model", "generate_greedy")
+def generate_bench():
+    import torch
+
+    from engine import InferenceEngine
+    from tiny_model import BENCH_PROMPTS, build_tiny_model
+
+    torch.set_num_threads(1)  # steadier samples than a shared thread pool
+    model, tokenizer = build_tiny_model()
+    engine = InferenceEngine(model, tokenizer)
+    prompts = BENCH_PROMPTS[:4]
+    max_new_tokens = 32
+    outputs = engine.generate_batch(prompts, do_sample=False, max_new_tokens=max_new_tokens)
+    tokens = sum(len(tokenizer(o, add_special_tokens=False)["input_ids"]) for o in outputs)
+
+    def run():
+        engine.generate_batch(prompts, do_sample=False, max_new_tokens=max_new_tokens)
+    return run, max(tokens, 1), "tokens"
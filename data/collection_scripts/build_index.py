@@ -0,0 +1,46 @@
+import json
+import sys
+from pathlib import Path
+
+# The index format lives with the code that reads it at inference time
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "inference"))
+from retrieval import ComponentIndex, build_component_index  # noqa: E402
+
+def load_items():
+    raw_files = {
+        "magicui": "data/raw/magicui_full.json",
+        "aceternity": "data/raw/aceternity.json"
+    }
+
+    items = []
+    for name, file_path in raw_files.items():
+        path = Path(file_path)
+        if not path.exists():
+            print(f"Warning: Raw data file not found, skipping: {file_path}")
+            continue
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict) and "components" in data:
+            data = data["components"]
+
+        for item in data:
+            try:
+                if isinstance(item, str):
+                    item = json.loads(item)
+                if item.get("prompt") and item.get("completion"):
+                    json.loads(item["completion"])
+                    items.append(item)
+            except (AttributeError, json.JSONDecodeError) as e:
+                print(f"Error processing {name} item: {str(e)}")
+        print(f"Successfully loaded {len(data)} items from {name}")
+    return items
+
+def build_index(out_dir="data/processed/component_index"):
+    items = load_items()
+    path = build_component_index(items, out_dir)
+    index = ComponentIndex(path)
+    print(f"Successfully indexed {index.num_docs} components ({len(index.vocab)} terms) into {path}")
+    index.close()
+
+if __name__ == "__main__":
+    build_index(*sys.argv[1:2])
@@ -1,6 +1,12 @@
 import json
+import sys
+from collections import Counter
 from pathlib import Path
 
+# The validator is shared with the serving path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "inference"))
+from registry_validator import RegistryValidator  # noqa: E402
+
 def format_dataset():
     try:
         # Create processed directory if it doesn't exist
@@ -36,8 +42,8 @@ def format_dataset():
                 print(f"Error loading {name} data: {str(e)}")
                 continue  # Continue with next file instead of raising
 
-        # Format for fine-tuning
-        formatted = []
+        # Parse completions, then drop the ones that are not valid registry items
+        candidates = []
         for item in combined_data:
             try:
                 # Handle both direct items and JSON strings in 'completion'
@@ -50,14 +56,37 @@ def format_dataset():
                 if not prompt or not completion:
                     print(f"Skipping item with missing prompt/completion: {item}")
                     continue
-                    
-                formatted.append({
-                    "text": f"<|prompt|>{prompt}<|completion|>{completion}<|endoftext|>"
-                })
+
+                candidates.append((prompt, completion, json.loads(completion)))
             except (KeyError, json.JSONDecodeError) as e:
                 print(f"Error processing item: {str(e)}")
                 continue  # Skip malformed items
 
+        validator = RegistryValidator()
+        results = validator.validate_batch([parsed for _, _, parsed in candidates])
+
+        # Format for fine-tuning
+        formatted = []
+        rejected = []
+        for (prompt, completion, _), errors in zip(candidates, results):
+            if errors:
+                rejected.append({"prompt": prompt, "errors": [error.as_dict() for error in errors]})
+                continue
+            formatted.append({
+                "text": f"<|prompt|>{prompt}<|completion|>{completion}<|endoftext|>"
+            })
+
+        rejected_path = processed_dir / "rejected.jsonl"
+        if rejected:
+            codes = Counter(error["code"] for item in rejected for error in item["errors"])
+            summary = ", ".join(f"{code}={count}" for code, count in codes.most_common())
+            print(f"Warning: Rejected {len(rejected)} invalid registry items ({summary}), see {rejected_path}")
+            with rejected_path.open("w", encoding="utf-8") as f:
+                for item in rejected:
+                    f.write(json.dumps(item) + "\n")
+        else:
+            rejected_path.unlink(missing_ok=True)  # left over from an earlier run
+
         # Save the formatted dataset
         output_path = processed_dir / "dataset.jsonl"
         with output_path.open("w", encoding="utf-8") as f:
@@ -0,0 +1,176 @@
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+BASE_ADAPTER = "__base__"  # peft's name for "no adapter" rows in a mixed batch
+WEIGHT_FILES = ("adapter_model.safetensors", "adapter_model.bin")
+
+
+class AdapterLoadError(RuntimeError):
+    """Some adapters could not be loaded; ``failures`` maps each name to its error"""
+
+    def __init__(self, failures: Dict[str, Exception]):
+        super().__init__("; ".join(f"{name}: {error!r}" for name, error in failures.items()))
+        self.failures = failures
+
+
+def list_adapters(adapter_dir) -> List[str]:
+    """Names of the peft adapter directories under adapter_dir"""
+    adapter_dir = Path(adapter_dir)
+    if not adapter_dir.is_dir():
+        return []
+    return sorted(p.name for p in adapter_dir.iterdir() if (p / "adapter_config.json").exists())
+
+
+class AdapterPool:
+    """LoRA adapters served on top of one shared base model.
+
+    Adapters live in ``adapter_dir/<name>/`` as saved by peft (``save_pretrained``).
+    They are loaded into the base model the first time a request names them. The
+    least recently used ones are unloaded when their weights exceed
+    ``max_bytes``. An adapter whose files change on disk is reloaded before its
+    next request, and new directories are picked up without a restart. Rows of
+    one batch can use different adapters via peft's ``adapter_names``, so
+    nothing is merged into the base weights.
+    """
+
+    def __init__(self, base_model, adapter_dir: str, max_bytes: int = 256 * 1024 * 1024):
+        self.base_model = base_model
+        self.model = base_model  # becomes the PeftModel once the first adapter is loaded
+        self.adapter_dir = Path(adapter_dir)
+        self.max_bytes = max_bytes
+        self._loaded: "OrderedDict[str, Dict]" = OrderedDict()  # name -> {"bytes", "version"}
+        self._lock = threading.Lock()
+        self.stats = {"loads": 0, "reloads": 0, "evictions": 0}
+
+    def available(self) -> List[str]:
+        return list_adapters(self.adapter_dir)
+
+    def version(self, name: str) -> Dict[str, str]:
+        """File stamps of the adapter's config and weights; changes whenever they change on disk"""
+        path = self.adapter_dir / name
+        if not (path / "adapter_config.json").exists():
+            raise KeyError(f"unknown adapter: {name} (looked in {self.adapter_dir})")
+        stamps = {}
+        for file in ("adapter_config.json",) + WEIGHT_FILES:
+            if (path / file).exists():
+                stat = (path / file).stat()
+                stamps[file] = f"{stat.st_size}:{stat.st_mtime_ns}"
+        return stamps
+
+    def fingerprint(self, name: Optional[str]) -> str:
+        """Stable id of an adapter version, for keying caches of its outputs"""
+        if name is None:
+            return BASE_ADAPTER
+        return self._fingerprint(name, self.version(name))
+
+    def loaded_fingerprint(self, name: str) -> str:
+        """Fingerprint of the version currently loaded, i.e. what a batch after acquire() runs"""
+        with self._lock:
+            return self._fingerprint(name, self._loaded[name]["version"])
+
+    def acquire(self, names: Iterable[str]):
+        """Make sure every named adapter is loaded and current; returns the model to run.
+
+        Each adapter is handled on its own: one that is missing or fails to load
+        (e.g. half-written during a hot reload) is dropped and reported in an
+        AdapterLoadError after the others are ready, so callers can still serve
+        the rows that do not need it.
+        """
+        names = set(names)
+        failures = {}
+        with self._lock:
+            for name in names:
+                try:
+                    version = self.version(name)
+                    loaded = self._loaded.get(name)
+                    if loaded is not None and loaded["version"] != version:
+                        print(f"🔄 Adapter {name} changed on disk, reloading")
+                        self._reload(name, version)
+                        self.stats["reloads"] += 1
+                    elif loaded is None:
+                        self._load(name, version)
+                    self._loaded.move_to_end(name)
+                except Exception as e:
+                    print(f"❌ Adapter {name} could not be loaded: {e!r}")
+                    self._discard(name)
+                    failures[name] = e
+            self._evict(keep=names)
+            if failures:
+                raise AdapterLoadError(failures)
+            return self.model
+
+    def forward_kwargs(self, adapters: List[Optional[str]]) -> Dict:
+        """Per-row adapter selection for generate()/forward(); rows without an adapter use the base weights"""
+        if self.model is self.base_model:
+            return {}
+        return {"adapter_names": [name or BASE_ADAPTER for name in adapters]}
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "loaded": list(self._loaded),
+                "loaded_bytes": sum(info["bytes"] for info in self._loaded.values()),
+                "max_bytes": self.max_bytes,
+            }
+
+    # --------------------------
+    # Internals (caller holds the lock)
+    # --------------------------
+
+    @staticmethod
+    def _fingerprint(name: str, version: Dict[str, str]) -> str:
+        return f"{name}@" + "|".join(f"{k}={v}" for k, v in sorted(version.items()))
+
+    def _discard(self, name: str):
+        """Forget an adapter after a failed load, so the next request starts from a clean load"""
+        self._loaded.pop(name, None)
+        if self.model is not self.base_model and name in self.model.peft_config:
+            try:
+                self.model.delete_adapter(name)
+            except Exception:
+                pass
+
+    def _load(self, name: str, version: Dict[str, str]):
+        from peft import PeftModel
+
+        path = str(self.adapter_dir / name)
+        if self.model is self.base_model:
+            self.model = PeftModel.from_pretrained(self.base_model, path, adapter_name=name, is_trainable=False)
+        else:
+            self.model.load_adapter(path, adapter_name=name, is_trainable=False)
+        self.model.eval()
+        marker = f".{name}."
+        size = sum(p.numel() * p.element_size() for n, p in self.model.named_parameters() if marker in n)
+        self._loaded[name] = {"bytes": size, "version": version}
+        self.stats["loads"] += 1
+        print(f"✅ Adapter {name} loaded ({size / 1e6:.1f} MB)")
+
+    def _reload(self, name: str, version: Dict[str, str]):
+        from peft.utils import load_peft_weights, set_peft_model_state_dict
+
+        old = self._loaded[name]["version"]
+        if old.get("adapter_config.json") == version.get("adapter_config.json"):
+            # Same rank and targets: swap the weights in place, requests keep using the same slots
+            set_peft_model_state_dict(self.model, load_peft_weights(str(self.adapter_dir / name)), adapter_name=name)
+            self._loaded[name]["version"] = version
+        else:
+            self._unload(name)
+            self._load(name, version)
+
+    def _unload(self, name: str):
+        self.model.delete_adapter(name)
+        del self._loaded[name]
+
+    def _evict(self, keep):
+        total = sum(info["bytes"] for info in self._loaded.values())
+        for name in list(self._loaded):
+            if total <= self.max_bytes:
+                break
+            if name in keep:
+                continue
+            total -= self._loaded[name]["bytes"]
+            self._unload(name)
+            self.stats["evictions"] += 1
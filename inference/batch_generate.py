@@ -0,0 +1,198 @@
+"""Generate registry items for a large JSONL file of prompts.
+
+Reads prompts as a stream (``{"prompt": ...}`` or processed-dataset
+``{"text": ...}`` lines), sorts each window by prompt length so batches need
+little padding, and packs batches up to a token budget. Results go to sharded
+JSONL in the output directory, one row per prompt with the raw completion and
+the ``format_output`` result. Rerunning with the same output directory skips
+prompts that already have a row.
+
+    python batch_generate.py prompts.jsonl --out generated/ --token-budget 32768
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Tuple
+
+from engine import InferenceEngine
+from json_repair import extract_registry_item
+
+SHARD_PATTERN = "part-{:05d}.jsonl"
+
+
+def iter_prompts(path: Path) -> Iterator[Tuple[str, str]]:
+    """Yield (id, prompt); ids default to the line number so reruns line up"""
+    with path.open(encoding="utf-8") as f:
+        for line_no, line in enumerate(f):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            prompt = record.get("prompt")
+            if prompt is None and "text" in record:
+                prompt = record["text"].split("<|prompt|>", 1)[-1].split("<|completion|>", 1)[0]
+            if not prompt:
+                print(f"⚠️ Skipping line {line_no + 1}: no prompt")
+                continue
+            yield str(record.get("id", line_no)), prompt
+
+
+def completed_ids(out_dir: Path) -> Set[str]:
+    """Ids already written by earlier runs; a torn last line from a crash is ignored"""
+    done = set()
+    for shard in sorted(out_dir.glob("part-*.jsonl")):
+        with shard.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["id"])
+                except (json.JSONDecodeError, KeyError):
+                    continue
+    return done
+
+
+class ShardWriter:
+    """Appends rows to part-NNNNN.jsonl files, starting a new shard every ``shard_size`` rows"""
+
+    def __init__(self, out_dir: Path, shard_size: int):
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        # Always start a fresh shard after the highest existing one, so a resumed run never
+        # appends after a torn line or overwrites a shard when earlier ones were removed
+        stems = [p.stem[len("part-"):] for p in out_dir.glob("part-*.jsonl")]
+        self.index = max((int(stem) for stem in stems if stem.isdigit()), default=-1) + 1
+        self.rows = 0
+        self._file = None
+
+    def write(self, rows: List[Dict]):
+        for row in rows:
+            if self._file is None or self.rows >= self.shard_size:
+                self._rotate()
+            self._file.write(json.dumps(row) + "\n")
+            self.rows += 1
+        self._file.flush()
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+            self.index += 1
+        self._file = (self.out_dir / SHARD_PATTERN.format(self.index)).open("x", encoding="utf-8")
+        self.rows = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+def plan_batches(items: List[Tuple[str, str, int]], max_new_tokens: int, token_budget: int, max_batch_size: int):
+    """Group length-sorted prompts so each padded batch stays within the token budget"""
+    items = sorted(items, key=lambda item: item[2])
+    batch = []
+    for item in items:
+        # Sorted ascending, so the newest item is the longest and sets the padded width
+        cost = (len(batch) + 1) * (item[2] + max_new_tokens)
+        if batch and (cost > token_budget or len(batch) >= max_batch_size):
+            yield batch
+            batch = []
+        batch.append(item)
+    if batch:
+        yield batch
+
+
+def run(engine: InferenceEngine, prompts: Iterator[Tuple[str, str]], writer: ShardWriter, args) -> Dict:
+    params = {"max_new_tokens": args.max_new_tokens, "do_sample": args.temperature > 0}
+    if args.temperature > 0:
+        params["temperature"] = args.temperature
+    if args.ngram_index:
+        params["speculative"] = True
+
+    totals = {"prompts": 0, "tokens": 0, "valid": 0, "repaired": 0}
+    start = time.perf_counter()
+
+    def flush(window):
+        lengths = [len(ids) for ids in engine.tokenizer([p for _, p in window], add_special_tokens=False)["input_ids"]]
+        items = [(i, p, min(n, engine.max_prompt_tokens)) for (i, p), n in zip(window, lengths)]
+        for batch in plan_batches(items, args.max_new_tokens, args.token_budget, args.max_batch_size):
+            outputs = engine.generate_batch([p for _, p, _ in batch], **params)
+            rows = []
+            for (prompt_id, prompt, _), raw in zip(batch, outputs):
+                result = extract_registry_item(raw)
+                totals["valid"] += result.value is not None
+                totals["repaired"] += result.value is not None and result.repaired
+                rows.append({
+                    "id": prompt_id,
+                    "prompt": prompt,
+                    "raw": raw,
+                    # Same shape as format_output(raw), without parsing the row a second time
+                    "output": result.value if result.value is not None else {"error": result.error, "raw_output": raw},
+                    "repairs": result.repairs,
+                })
+            writer.write(rows)
+
+            totals["prompts"] += len(batch)
+            totals["tokens"] += sum(len(ids) for ids in engine.tokenizer(outputs, add_special_tokens=False)["input_ids"])
+            elapsed = time.perf_counter() - start
+            print(
+                f"📊 {totals['prompts']} prompts | {totals['prompts'] / elapsed:.2f} prompts/s | "
+                f"{totals['tokens'] / elapsed:.1f} tokens/s | batch of {len(batch)}"
+            )
+
+    window = []
+    for item in prompts:
+        window.append(item)
+        if len(window) >= args.window:
+            flush(window)
+            window = []
+    if window:
+        flush(window)
+
+    totals["elapsed_s"] = time.perf_counter() - start
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("prompts", type=Path, help="JSONL with a prompt (or dataset text) per line")
+    parser.add_argument("--out", type=Path, default=Path("generated"))
+    parser.add_argument("--model", default="./shadcn-component-generator")
+    parser.add_argument("--max-new-tokens", type=int, default=512)
+    parser.add_argument("--temperature", type=float, default=0.0, help="0 for greedy decoding")
+    parser.add_argument("--token-budget", type=int, default=32768, help="padded prompt + new tokens per batch")
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--window", type=int, default=4096, help="prompts read and length-sorted at a time")
+    parser.add_argument("--shard-size", type=int, default=10000, help="rows per output shard")
+    parser.add_argument("--constrained", type=int, default=1, help="registry-item constrained decoding (1/0)")
+    parser.add_argument(
+        "--ngram-index",
+        help="index from ngram_index.py; greedy speculative decoding, one prompt per batch",
+    )
+    args = parser.parse_args()
+    if args.ngram_index:
+        if args.temperature > 0:
+            parser.error("--ngram-index needs greedy decoding (--temperature 0)")
+        # Speculative decoding only runs on batches of one
+        args.max_batch_size = 1
+
+    args.out.mkdir(parents=True, exist_ok=True)
+    done = completed_ids(args.out)
+    if done:
+        print(f"🔄 Resuming: {len(done)} prompts already generated in {args.out}")
+    pending = (item for item in iter_prompts(args.prompts) if item[0] not in done)
+
+    engine = InferenceEngine.from_pretrained(
+        args.model, constrained=bool(args.constrained), ngram_index_path=args.ngram_index
+    )
+    writer = ShardWriter(args.out, args.shard_size)
+    try:
+        totals = run(engine, pending, writer, args)
+    finally:
+        writer.close()
+
+    elapsed = max(totals["elapsed_s"], 1e-9)
+    print(f"\n✅ Generated {totals['prompts']} prompts in {elapsed:.1f} s into {args.out}")
+    print(f"  sustained: {totals['prompts'] / elapsed:.2f} prompts/s, {totals['tokens'] / elapsed:.1f} tokens/s")
+    print(f"  valid registry items: {totals['valid']} ({totals['repaired']} after repair)")
+
+
+if __name__ == "__main__":
+    main()
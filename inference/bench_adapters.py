@@ -0,0 +1,183 @@
+"""Benchmark multi-adapter serving against one merged process per adapter.
+
+Builds a tiny random LLaMA base and three random (non-zero) LoRA adapters, one
+per component style. "multi" serves all of them from one process on a shared
+base model, with requests for different adapters batched together. "per
+process" runs one merged model per adapter concurrently, as deploying a
+merged checkpoint per style would. Reports total resident memory and
+throughput, checks that greedy outputs agree, and checks that an adapter
+rewritten on disk is hot-reloaded.
+
+    python bench_adapters.py --hidden-size 256 --layers 4 --max-new-tokens 64
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from tiny_model import BENCH_PROMPTS, rss_mb, save_tiny_model
+
+ADAPTERS = ["magicui", "aceternity", "inhouse"]
+PROMPTS = BENCH_PROMPTS[:4]
+
+
+def worker_multi(base_dir: str, adapter_dir: str, max_new_tokens: int, threads: int):
+    """One base model, every adapter; each batch mixes all of them"""
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    from engine import InferenceEngine
+
+    torch.set_num_threads(threads)
+    model = AutoModelForCausalLM.from_pretrained(base_dir)
+    tokenizer = AutoTokenizer.from_pretrained(base_dir)
+    engine = InferenceEngine(model, tokenizer, adapter_dir=adapter_dir, prefix_cache_tokens=0)
+    params = {"do_sample": False, "max_new_tokens": max_new_tokens}
+    prompts = [p for p in PROMPTS for _ in ADAPTERS]
+    adapters = [a for _ in PROMPTS for a in ADAPTERS]
+    engine.generate_batch(PROMPTS[:1] * len(ADAPTERS), adapters=ADAPTERS, **{**params, "max_new_tokens": 4})
+
+    start = time.perf_counter()
+    outputs = engine.generate_batch(prompts, adapters=adapters, **params)
+    elapsed = time.perf_counter() - start
+    tokens = sum(len(tokenizer(o, add_special_tokens=False)["input_ids"]) for o in outputs)
+    rss = rss_mb()
+
+    # Rewrite one adapter on disk (same files, new mtime) and check it is picked up without a restart
+    weights = next(p for p in (Path(adapter_dir) / ADAPTERS[0]).iterdir() if p.name.startswith("adapter_model"))
+    os.utime(weights, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    reloaded = engine.generate_batch([PROMPTS[0]], adapters=[ADAPTERS[0]], **params)[0]
+
+    print(json.dumps({
+        "rss_mb": rss,
+        "elapsed_s": elapsed,
+        "tokens": tokens,
+        "outputs": {f"{a}:{p}": o for a, p, o in zip(adapters, prompts, outputs)},
+        "reload_matches": reloaded == outputs[0],
+        "adapter_metrics": engine.adapters.metrics(),
+    }))
+
+
+def worker_merged(base_dir: str, adapter_path: str, max_new_tokens: int, threads: int):
+    """One merged adapter per process, as when each style is deployed as its own checkpoint"""
+    import torch
+    from transformers import AutoTokenizer
+
+    from engine import InferenceEngine
+    from export_cpu import load_merged
+
+    torch.set_num_threads(threads)
+    model = load_merged(adapter_path, base_model=base_dir)
+    tokenizer = AutoTokenizer.from_pretrained(base_dir)
+    engine = InferenceEngine(model, tokenizer, prefix_cache_tokens=0)
+    params = {"do_sample": False, "max_new_tokens": max_new_tokens}
+    engine.generate_batch(PROMPTS[:1], **{**params, "max_new_tokens": 4})
+
+    start = time.perf_counter()
+    outputs = engine.generate_batch(PROMPTS, **params)
+    elapsed = time.perf_counter() - start
+    tokens = sum(len(tokenizer(o, add_special_tokens=False)["input_ids"]) for o in outputs)
+    name = Path(adapter_path).name
+    print(json.dumps({
+        "rss_mb": rss_mb(),
+        "elapsed_s": elapsed,
+        "tokens": tokens,
+        "outputs": {f"{name}:{p}": o for p, o in zip(PROMPTS, outputs)},
+    }))
+
+
+def spawn(mode: str, base_dir: Path, target: Path, max_new_tokens: int, threads: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, __file__, "--worker", mode, "--base-dir", str(base_dir), "--target", str(target),
+         "--max-new-tokens", str(max_new_tokens), "--threads", str(threads)],
+        stdout=subprocess.PIPE,
+        text=True,
+        cwd=Path(__file__).resolve().parent,
+    )
+
+
+def collect(process: subprocess.Popen) -> dict:
+    stdout, _ = process.communicate()
+    if process.returncode:
+        raise SystemExit(f"❌ Worker failed with exit code {process.returncode}")
+    return json.loads(stdout.strip().splitlines()[-1])
+
+
+def build_adapters(tmp: Path, hidden_size: int, layers: int):
+    import torch
+    from peft import LoraConfig, get_peft_model
+    from transformers import AutoModelForCausalLM
+
+    base_dir = save_tiny_model(tmp / "base", hidden_size=hidden_size, num_layers=layers)
+    for seed, name in enumerate(ADAPTERS):
+        torch.manual_seed(seed)
+        base = AutoModelForCausalLM.from_pretrained(base_dir)
+        # Same targets as the notebook; non-zero B so each adapter actually changes the outputs
+        config = LoraConfig(
+            r=16,
+            lora_alpha=32,
+            target_modules=["q_proj", "k_proj", "v_proj", "o_proj"],
+            task_type="CAUSAL_LM",
+            init_lora_weights=False,
+        )
+        get_peft_model(base, config).save_pretrained(tmp / "adapters" / name)
+    return base_dir, tmp / "adapters"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hidden-size", type=int, default=256)
+    parser.add_argument("--layers", type=int, default=4)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--worker", choices=["multi", "merged"], help=argparse.SUPPRESS)
+    parser.add_argument("--base-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--target", help=argparse.SUPPRESS)
+    parser.add_argument("--threads", type=int, default=1, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker == "multi":
+        worker_multi(args.base_dir, args.target, args.max_new_tokens, args.threads)
+        return
+    if args.worker == "merged":
+        worker_merged(args.base_dir, args.target, args.max_new_tokens, args.threads)
+        return
+
+    # Both setups get the same cores in total
+    cores = os.cpu_count() or 1
+    per_process = max(1, cores // len(ADAPTERS))
+    with tempfile.TemporaryDirectory() as tmp:
+        base_dir, adapter_dir = build_adapters(Path(tmp), args.hidden_size, args.layers)
+
+        multi = collect(spawn("multi", base_dir, adapter_dir, args.max_new_tokens, cores))
+
+        start = time.perf_counter()
+        processes = [
+            spawn("merged", base_dir, adapter_dir / name, args.max_new_tokens, per_process) for name in ADAPTERS
+        ]
+        merged = [collect(p) for p in processes]
+        merged_wall = time.perf_counter() - start
+
+    merged_outputs = {k: v for result in merged for k, v in result["outputs"].items()}
+    merged_tokens = sum(r["tokens"] for r in merged)
+    merged_elapsed = max(r["elapsed_s"] for r in merged)
+    agree = sum(multi["outputs"][k] == v for k, v in merged_outputs.items())
+
+    print(f"\n📊 hidden={args.hidden_size}, layers={args.layers}, {len(ADAPTERS)} adapters x {len(PROMPTS)} prompts, "
+          f"greedy, {args.max_new_tokens} new tokens, {cores} cores")
+    print(f"{'setup':<22}{'processes':>10}{'RSS MB':>9}{'tok/s':>9}")
+    print(f"{'multi-adapter':<22}{1:>10}{multi['rss_mb']:>9.1f}{multi['tokens'] / multi['elapsed_s']:>9.1f}")
+    print(f"{'merged per adapter':<22}{len(merged):>10}{sum(r['rss_mb'] for r in merged):>9.1f}"
+          f"{merged_tokens / merged_elapsed:>9.1f}")
+    print(f"  (per-adapter processes took {merged_wall:.1f} s wall including model loading)")
+    print(f"\n  outputs identical to the merged models: {agree}/{len(merged_outputs)}")
+    metrics = multi["adapter_metrics"]
+    print(f"  hot reload: {metrics['reloads']} reload(s), output unchanged: {multi['reload_matches']}")
+    print(f"  adapters loaded: {metrics['loaded']} ({metrics['loaded_bytes'] / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark the int8 CPU export against the fp32 CPU path.
+
+Builds a tiny random LLaMA model, wraps it in a random (non-zero) LoRA adapter
+like the one training saves, exports it with export_cpu.py, then loads each
+backend in a fresh process. Reports load time, resident memory after loading
+and after serving (the fp32 safetensors are memory-mapped and only paged in as
+the weights are used), peak resident memory (VmHWM, which catches transient
+copies made while loading) and greedy tokens/sec. Accuracy is measured
+teacher-forced: both backends score the same dataset texts, and the int8 logits
+are compared with fp32 by top-1 agreement and relative error.
+
+    python bench_cpu_export.py --hidden-size 1024 --layers 8 --max-new-tokens 64
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from tiny_model import BENCH_PROMPTS, DATASET_PROMPTS, load_corpus_texts, rss_mb, save_tiny_model
+
+PROMPTS = DATASET_PROMPTS[:1] + BENCH_PROMPTS[:3]
+
+
+def worker(backend: str, model_dir: str, max_new_tokens: int, eval_texts: int, eval_tokens: int, logits_out: str):
+    """Runs in its own process so load time and RSS are not polluted by the other backend"""
+    import accelerate  # noqa: F401  imported up front so neither backend's RSS counts library code
+    import peft  # noqa: F401
+    import torch
+    from transformers import AutoTokenizer
+
+    from engine import InferenceEngine
+    from export_cpu import load_int8, load_merged
+
+    torch.set_num_threads(os.cpu_count() or 1)
+    baseline = rss_mb()
+    start = time.perf_counter()
+    model = load_int8(model_dir) if backend == "int8" else load_merged(model_dir)
+    load_s = time.perf_counter() - start
+    loaded_rss = rss_mb() - baseline
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    engine = InferenceEngine(model, tokenizer)
+    params = {"do_sample": False, "max_new_tokens": max_new_tokens}
+    engine.generate_batch(PROMPTS[:1], **{**params, "max_new_tokens": 4})  # warm-up
+
+    start = time.perf_counter()
+    outputs = [engine.generate_batch([p], **params)[0] for p in PROMPTS]
+    elapsed = time.perf_counter() - start
+    tokens = sum(len(tokenizer(o, add_special_tokens=False)["input_ids"]) for o in outputs)
+    serving_rss = rss_mb() - baseline
+    peak_rss = rss_mb("VmHWM") - baseline
+
+    # Teacher-forced: every position sees the same prefix on both backends, so errors do not compound
+    logits = []
+    with torch.no_grad():
+        for text in load_corpus_texts()[:eval_texts]:
+            input_ids = tokenizer(text, return_tensors="pt")["input_ids"][:, :eval_tokens]
+            logits.append(model(input_ids=input_ids).logits[0].float())
+    torch.save(logits, logits_out)
+    print(json.dumps({
+        "load_s": load_s,
+        "rss_mb": loaded_rss,
+        "serving_rss_mb": serving_rss,
+        "peak_rss_mb": peak_rss,
+        "tokens_per_s": tokens / elapsed,
+    }))
+
+
+def run_worker(backend: str, model_dir: Path, logits_out: Path, args) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, "--worker", backend, "--model-dir", str(model_dir),
+         "--max-new-tokens", str(args.max_new_tokens), "--eval-texts", str(args.eval_texts),
+         "--eval-tokens", str(args.eval_tokens), "--logits-out", str(logits_out)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parent,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def logit_agreement(reference, candidate):
+    """Top-1 agreement and relative L2 error of candidate logits against the reference, over all positions"""
+    import torch
+
+    reference, candidate = torch.cat(reference), torch.cat(candidate)
+    top1 = (reference.argmax(-1) == candidate.argmax(-1)).float().mean().item()
+    rel_error = ((candidate - reference).norm() / reference.norm()).item()
+    return top1, rel_error, reference.shape[0]
+
+
+def build_adapter(tmp: Path, hidden_size: int, layers: int) -> Path:
+    from peft import LoraConfig, get_peft_model
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    base_dir = save_tiny_model(tmp / "base", hidden_size=hidden_size, num_layers=layers)
+    base = AutoModelForCausalLM.from_pretrained(base_dir)
+    # Same targets as the notebook; non-zero B so merging actually changes the weights
+    config = LoraConfig(
+        r=16,
+        lora_alpha=32,
+        target_modules=["q_proj", "k_proj", "v_proj", "o_proj"],
+        task_type="CAUSAL_LM",
+        init_lora_weights=False,
+    )
+    adapter_dir = tmp / "adapter"
+    get_peft_model(base, config).save_pretrained(adapter_dir)
+    AutoTokenizer.from_pretrained(base_dir).save_pretrained(adapter_dir)
+    return adapter_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    # Large enough that the Linear weights, which int8 shrinks 4x, dominate the process footprint
+    parser.add_argument("--hidden-size", type=int, default=1024)
+    parser.add_argument("--layers", type=int, default=8)
+    parser.add_argument("--max-new-tokens", type=int, default=64)
+    parser.add_argument("--eval-texts", type=int, default=16, help="dataset texts scored teacher-forced")
+    parser.add_argument("--eval-tokens", type=int, default=256, help="tokens scored per text")
+    parser.add_argument("--worker", choices=["fp32", "int8"], help=argparse.SUPPRESS)
+    parser.add_argument("--model-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--logits-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.model_dir, args.max_new_tokens, args.eval_texts, args.eval_tokens, args.logits_out)
+        return
+
+    import torch
+
+    from export_cpu import WEIGHTS_NAME, export_int8
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        adapter_dir = build_adapter(tmp, args.hidden_size, args.layers)
+        int8_dir = export_int8(adapter_dir, tmp / "int8")
+        base_mb = sum(f.stat().st_size for f in (tmp / "base").glob("*.safetensors")) / 1e6
+        int8_mb = (int8_dir / WEIGHTS_NAME).stat().st_size / 1e6
+
+        fp32 = run_worker("fp32", adapter_dir, tmp / "fp32-logits.pt", args)
+        int8 = run_worker("int8", int8_dir, tmp / "int8-logits.pt", args)
+        top1, rel_error, positions = logit_agreement(
+            torch.load(tmp / "fp32-logits.pt"), torch.load(tmp / "int8-logits.pt")
+        )
+
+    print(f"\n📊 hidden={args.hidden_size}, layers={args.layers}, {len(PROMPTS)} prompts, greedy, "
+          f"{args.max_new_tokens} new tokens")
+    print(f"{'backend':<9}{'weights MB':>11}{'load s':>9}{'load RSS':>10}{'serve RSS':>11}{'peak MB':>9}{'tok/s':>9}")
+    for name, size_mb, result in (("fp32", base_mb, fp32), ("int8", int8_mb, int8)):
+        print(f"{name:<9}{size_mb:>11.1f}{result['load_s']:>9.2f}{result['rss_mb']:>10.1f}"
+              f"{result['serving_rss_mb']:>11.1f}{result['peak_rss_mb']:>9.1f}{result['tokens_per_s']:>9.1f}")
+    print(f"\n  teacher-forced over {positions} positions: top-1 agreement {top1 * 100:.1f}%, "
+          f"logit relative error {rel_error:.4f}")
+
+
+if __name__ == "__main__":
+    main()
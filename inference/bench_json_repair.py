@@ -0,0 +1,158 @@
+"""Fuzz and benchmark suite for json_repair.extract_registry_item.
+
+Builds large malformed generations from the processed dataset and covers leading
+or trailing chatter with braces, several objects, truncation at random points,
+trailing commas and random byte damage. It then checks three things:
+
+* the extractor never raises and always returns a value or an error
+* outputs that still contain the full object give it back unchanged
+* truncated outputs come back as a repaired registry item
+
+It also times the extractor against the old find/rfind ``format_output`` on
+inputs of growing size, to show the cost grows linearly.
+
+    python bench_json_repair.py --cases 2000 --max-mb 8
+"""
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from json_repair import extract_registry_item, is_registry_item
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent.parent / "data/collection_scripts/data/processed/dataset.jsonl"
+
+CHATTER = [
+    "Sure! Here is the component you asked for:\n",
+    "```json\n",
+    "Note: wrap children in {braces} like {this}.\n",
+    'He said "use { carefully" and left.\n',
+]
+
+
+def legacy_format_output(raw_json):
+    """The original cli.format_output, kept for comparison"""
+    try:
+        return json.loads(raw_json)
+    except json.JSONDecodeError:
+        start = raw_json.find('{')
+        end = raw_json.rfind('}') + 1
+        if start != -1 and end != 0:
+            try:
+                return json.loads(raw_json[start:end])
+            except:
+                return {"error": "Could not parse JSON", "raw_output": raw_json}
+        return {"error": "No valid JSON found", "raw_output": raw_json}
+
+
+def load_items(corpus_path: Path) -> List[Dict]:
+    items = []
+    with corpus_path.open(encoding="utf-8") as f:
+        for line in f:
+            text = json.loads(line)["text"]
+            items.append(json.loads(text.split("<|completion|>", 1)[1].split("<|endoftext|>", 1)[0]))
+    return items
+
+
+def inflate(item: Dict, target_chars: int) -> Dict:
+    """Grow files[0].content until the serialised item reaches roughly target_chars"""
+    item = json.loads(json.dumps(item))
+    content = item["files"][0]["content"]
+    repeats = max(1, target_chars // max(1, len(content)))
+    item["files"][0]["content"] = "\n".join([content] * repeats)
+    return item
+
+
+def mutate(rng: random.Random, item: Dict):
+    """Return (kind, text, expected) where expected is the item when it must round-trip exactly"""
+    text = json.dumps(item, indent=2)
+    kind = rng.choice(["clean", "chatter", "multiple", "truncated", "trailing-comma", "damaged"])
+    if kind == "clean":
+        return kind, text, item
+    if kind == "chatter":
+        return kind, rng.choice(CHATTER) + text + "\n```\n" + rng.choice(CHATTER), item
+    if kind == "multiple":
+        return kind, '{"status": "ok"}\n' + text + "\n" + text, item
+    if kind == "truncated":
+        return kind, text[:rng.randint(1, len(text) - 1)], None
+    if kind == "trailing-comma":
+        return kind, text.replace('"\n    }', '",\n    }').replace("}\n  ]", "},\n  ]"), item
+
+    damaged = list(text)
+    for _ in range(rng.randint(1, 8)):
+        damaged[rng.randrange(len(damaged))] = rng.choice('{}[]",:\\ x')
+    return kind, "".join(damaged), None
+
+
+def fuzz(items: List[Dict], cases: int, seed: int) -> Dict:
+    rng = random.Random(seed)
+    stats = {}
+    for _ in range(cases):
+        kind, text, expected = mutate(rng, rng.choice(items))
+        result = extract_registry_item(text)  # must never raise
+        assert result.value is not None or result.error, kind
+
+        entry = stats.setdefault(kind, {"cases": 0, "recovered": 0, "legacy": 0})
+        entry["cases"] += 1
+        legacy = legacy_format_output(text)
+        if expected is not None:
+            assert result.value == expected, f"{kind}: extracted object differs"
+            entry["recovered"] += 1
+            entry["legacy"] += legacy == expected
+        else:
+            entry["recovered"] += is_registry_item(result.value)
+            entry["legacy"] += "error" not in legacy
+    return stats
+
+
+def time_call(fn, text: str, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def scaling(items: List[Dict], max_mb: float):
+    print("\n⏱️ Scaling (best of 3)")
+    print(f"{'size':>10}{'kind':>12}{'extract ms':>13}{'MB/s':>9}{'legacy ms':>12}")
+    size = 16 * 1024
+    while size <= max_mb * 1024 * 1024:
+        text = json.dumps(inflate(items[0], size), indent=2)
+        inputs = {
+            "valid": text,
+            "chatter": CHATTER[2] + text + CHATTER[2],
+            "truncated": text[: len(text) * 9 // 10],
+        }
+        for kind, payload in inputs.items():
+            elapsed = time_call(extract_registry_item, payload)
+            legacy = time_call(legacy_format_output, payload)
+            mb = len(payload) / 1024 / 1024
+            print(f"{len(payload):>10}{kind:>12}{elapsed * 1000:>13.2f}{mb / elapsed:>9.1f}{legacy * 1000:>12.2f}")
+        size *= 4
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-mb", type=float, default=8)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    args = parser.parse_args()
+
+    items = load_items(args.corpus)
+    stats = fuzz(items, args.cases, args.seed)
+
+    print(f"🧪 Fuzzed {args.cases} cases (seed {args.seed})")
+    print(f"{'kind':<16}{'cases':>8}{'recovered':>11}{'legacy':>9}")
+    for kind, entry in sorted(stats.items()):
+        print(f"{kind:<16}{entry['cases']:>8}{entry['recovered']:>11}{entry['legacy']:>9}")
+
+    scaling(items, args.max_mb)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark the hybrid retrieval index on a synthetic catalogue of components.
+
+Clones the scraped registry items under generated names until the catalogue
+holds --components entries, builds the index, then measures lookup latency and
+how often a query naming a component retrieves it first (and clears the serve
+threshold).
+
+    python bench_retrieval.py --components 50000 --queries 2000
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from response_cache import _percentile_ms
+from retrieval import ComponentIndex, RetrievalRouter, build_component_index
+
+DEFAULT_DATASET = Path(__file__).resolve().parent.parent / "data/collection_scripts/data/processed/dataset.jsonl"
+SYLLABLES = ["ra", "lo", "mi", "ne", "ka", "tu", "vo", "shi", "zen", "pa", "dri", "fle", "gor", "bex", "qui", "ly"]
+
+
+def load_items(dataset_path: Path):
+    items = []
+    with dataset_path.open(encoding="utf-8") as f:
+        for line in f:
+            text = json.loads(line)["text"]
+            completion = text.split("<|completion|>", 1)[1].split("<|endoftext|>", 1)[0]
+            items.append(json.loads(completion))
+    return items
+
+
+def synthetic_catalogue(items, count: int, rng: random.Random):
+    names = set()
+    for i in range(count):
+        while True:
+            words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))) for _ in range(2)]
+            name = "-".join(words)
+            if name not in names:
+                names.add(name)
+                break
+        base = items[i % len(items)]
+        title = " ".join(w.capitalize() for w in words)
+        item = {**base, "name": name, "title": title}
+        yield {"prompt": f"Generate a UI component like {title}", "completion": json.dumps(item, indent=2)}, title
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--components", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    records, titles = zip(*synthetic_catalogue(load_items(args.dataset), args.components, rng))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        build_component_index(records, tmp, dim=args.dim)
+        build_s = time.perf_counter() - start
+        index = ComponentIndex(tmp)
+        router = RetrievalRouter(index, serve_threshold=args.threshold)
+        index.search("warm up")
+
+        latencies = []
+        top1 = 0
+        for _ in range(args.queries):
+            doc_id = rng.randrange(index.num_docs)
+            query = f"Create a {titles[doc_id].lower()} component"
+            start = time.perf_counter()
+            matches = index.search(query, k=3)
+            latencies.append(time.perf_counter() - start)
+            top1 += matches[0].doc_id == doc_id
+            router.route(query)
+
+        print(f"\n📊 {index.num_docs} components, {len(index.vocab)} terms, dim={args.dim}, built in {build_s:.1f} s")
+        print(f"  search p50: {_percentile_ms(latencies, 50):.3f} ms")
+        print(f"  search p95: {_percentile_ms(latencies, 95):.3f} ms")
+        print(f"  top-1 hit:  {top1 / args.queries * 100:.1f}%")
+        print(f"  routing:    {router.stats}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
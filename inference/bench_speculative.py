@@ -0,0 +1,76 @@
+"""Benchmark n-gram speculative decoding against plain greedy decoding.
+
+Builds the n-gram index over the processed dataset with the tiny random model's
+tokenizer, then generates every prompt one at a time with and without
+speculation (and with and without the registry-item constraint). Reports
+tokens/sec and draft acceptance, and checks that the outputs are identical.
+
+    python bench_speculative.py --max-new-tokens 256
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from engine import InferenceEngine
+from ngram_index import DEFAULT_DATASET, build_index, iter_dataset_token_ids
+from tiny_model import BENCH_PROMPTS, DATASET_PROMPTS, build_tiny_model
+
+PROMPTS = [DATASET_PROMPTS[0], BENCH_PROMPTS[0], DATASET_PROMPTS[1], BENCH_PROMPTS[2]]
+
+
+def run(engine: InferenceEngine, params) -> dict:
+    outputs = []
+    engine.stats.update(drafted=0, accepted=0)
+    start = time.perf_counter()
+    for prompt in PROMPTS:
+        outputs.extend(engine.generate_batch([prompt], **params))
+    elapsed = time.perf_counter() - start
+    tokens = sum(len(engine.tokenizer(o, add_special_tokens=False)["input_ids"]) for o in outputs)
+    return {
+        "outputs": outputs,
+        "tokens_per_s": tokens / elapsed,
+        "acceptance": engine.stats["accepted"] / max(1, engine.stats["drafted"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-new-tokens", type=int, default=256)
+    parser.add_argument("--num-draft", type=int, default=8)
+    parser.add_argument("--n", type=int, default=3)
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    args = parser.parse_args()
+
+    model, tokenizer = build_tiny_model()
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = build_index(iter_dataset_token_ids(tokenizer, args.dataset), Path(tmp) / "ngram.idx", n=args.n)
+        engine = InferenceEngine(
+            model,
+            tokenizer,
+            fsm_cache_dir=tmp,
+            ngram_index_path=str(index_path),
+            num_draft_tokens=args.num_draft,
+        )
+        engine.generate_batch(PROMPTS[:1], do_sample=False, max_new_tokens=8)  # warm-up
+
+        print(f"\n📊 {len(PROMPTS)} prompts, greedy, up to {args.max_new_tokens} new tokens")
+        print(f"{'mode':<14}{'greedy tok/s':>14}{'spec tok/s':>12}{'speedup':>9}{'accepted':>10}{'identical':>11}")
+        for constrained in (False, True):
+            params = {"do_sample": False, "max_new_tokens": args.max_new_tokens, "constrained": constrained}
+            greedy = run(engine, {**params, "speculative": False})
+            spec = run(engine, {**params, "speculative": True})
+            identical = greedy["outputs"] == spec["outputs"]
+            label = "constrained" if constrained else "free"
+            print(
+                f"{label:<14}{greedy['tokens_per_s']:>14.1f}{spec['tokens_per_s']:>12.1f}"
+                f"{spec['tokens_per_s'] / greedy['tokens_per_s']:>8.2f}x{spec['acceptance'] * 100:>9.1f}%"
+                f"{'yes' if identical else 'NO':>11}"
+            )
+            if not identical:
+                raise SystemExit("❌ Speculative output differs from greedy decoding")
+        engine.ngram_index.close()
+
+
+if __name__ == "__main__":
+    main()
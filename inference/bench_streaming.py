@@ -0,0 +1,150 @@
+"""Measure time-to-first-field separately from total latency for streamed generation.
+
+A random model never writes a registry item, so the benchmark has three parts:
+
+1. Live: stream from the engine with a tiny random LLaMA model to measure the real
+   time-to-first-chunk and per-token decode latency on this machine.
+2. Concurrent: several clients stream at once, which the engine batches into one
+   generate call, compared with the same streams run one after another.
+3. Replay: play every completion in the processed dataset back token by token at
+   that measured rate through ``IncrementalRegistryParser``. This shows when each
+   registry field would reach the UI, compared with waiting for the full output.
+
+    python bench_streaming.py --max-new-tokens 128 --concurrency 8
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from engine import InferenceEngine
+from json_stream import IncrementalRegistryParser
+from tiny_model import DEFAULT_CORPUS, build_tiny_model
+
+FIELDS = ["name", "title", "description"]
+
+
+def measure_live(engine: InferenceEngine, max_new_tokens: int) -> Dict:
+    """Stream one request and time the first chunk and the whole completion"""
+    params = {"do_sample": False, "max_new_tokens": max_new_tokens, "min_new_tokens": max_new_tokens}
+    engine.generate("warm-up", **params)
+
+    start = time.perf_counter()
+    first_chunk = None
+    for _ in engine.stream("A horizontal scrolling marquee with pauseOnHover", **params):
+        if first_chunk is None:
+            first_chunk = time.perf_counter() - start
+    total = time.perf_counter() - start
+    return {"first_chunk_s": first_chunk, "total_s": total, "per_token_s": total / max_new_tokens}
+
+
+def measure_concurrent(engine: InferenceEngine, concurrency: int, max_new_tokens: int) -> Dict:
+    """Stream from several threads at once and time the first chunk of each and the whole wave"""
+    params = {"do_sample": False, "max_new_tokens": max_new_tokens, "min_new_tokens": max_new_tokens}
+    first_chunks = []
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client(i: int):
+        barrier.wait()
+        start = time.perf_counter()
+        first = None
+        for _ in engine.stream(f"Create component number {i}", **params):
+            if first is None:
+                first = time.perf_counter() - start
+        first_chunks.append(first)
+
+    batches_before = engine.stats["batches"]
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - start
+    return {
+        "total_s": total,
+        "first_chunk_p50_s": statistics.median(first_chunks),
+        "first_chunk_max_s": max(first_chunks),
+        "batches": engine.stats["batches"] - batches_before,
+    }
+
+
+def load_completions(corpus_path: Path) -> List[str]:
+    completions = []
+    with corpus_path.open(encoding="utf-8") as f:
+        for line in f:
+            text = json.loads(line)["text"]
+            completions.append(text.split("<|completion|>", 1)[1].split("<|endoftext|>", 1)[0])
+    return completions
+
+
+def replay(completion: str, tokenizer, per_token_s: float) -> Dict:
+    """Feed a completion through the parser one token at a time on a simulated clock"""
+    token_ids = tokenizer(completion, add_special_tokens=False)["input_ids"]
+    parser = IncrementalRegistryParser()
+    seen = {}
+    parse_time = 0.0
+    previous = ""
+    for i in range(1, len(token_ids) + 1):
+        # Decode the growing prefix like TextIteratorStreamer does so multi-byte tokens stay intact
+        text = tokenizer.decode(token_ids[:i])
+        chunk, previous = text[len(previous):], text
+        t0 = time.perf_counter()
+        events = parser.feed(chunk)
+        parse_time += time.perf_counter() - t0
+        for path, _ in events:
+            seen.setdefault(path[0] if len(path) == 1 else "files", i * per_token_s + parse_time)
+
+    total = len(token_ids) * per_token_s + parse_time
+    return {
+        "tokens": len(token_ids),
+        "first_field_s": min(seen.values()) if seen else total,
+        "metadata_s": max(seen.get(f, total) for f in FIELDS),
+        "total_s": total,
+        "parse_s": parse_time,
+        "complete": parser.done,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-new-tokens", type=int, default=128)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    args = parser.parse_args()
+
+    model, tokenizer = build_tiny_model()
+    # Wait long enough for every concurrent client to join the first batch
+    with InferenceEngine(model, tokenizer, max_batch_size=args.concurrency, max_wait_ms=50) as engine:
+        live = measure_live(engine, args.max_new_tokens)
+        concurrent = measure_concurrent(engine, args.concurrency, args.max_new_tokens)
+
+    print(f"\n📡 Live stream ({args.max_new_tokens} tokens, tiny random model)")
+    print(f"   First chunk: {live['first_chunk_s'] * 1000:.1f} ms")
+    print(f"   Total:       {live['total_s'] * 1000:.1f} ms ({live['per_token_s'] * 1000:.2f} ms/token)")
+
+    serial = live["total_s"] * args.concurrency
+    print(f"\n👥 {args.concurrency} concurrent streams ({concurrent['batches']} generate call(s))")
+    print(f"   First chunk: p50 {concurrent['first_chunk_p50_s'] * 1000:.1f} ms, "
+          f"max {concurrent['first_chunk_max_s'] * 1000:.1f} ms")
+    print(f"   All done:    {concurrent['total_s'] * 1000:.1f} ms "
+          f"(one after another: ~{serial * 1000:.1f} ms, {serial / concurrent['total_s']:.1f}x)")
+
+    runs = [replay(c, tokenizer, live["per_token_s"]) for c in load_completions(args.corpus)]
+    median = lambda key: statistics.median(r[key] for r in runs) * 1000
+
+    print(f"\n🧩 Replay of {len(runs)} dataset completions (median over items)")
+    print(f"   Tokens per completion:     {statistics.median(r['tokens'] for r in runs):.0f}")
+    print(f"   Time to first field:       {median('first_field_s'):.1f} ms")
+    print(f"   Time to name/title/desc:   {median('metadata_s'):.1f} ms")
+    print(f"   Total latency (no stream): {median('total_s'):.1f} ms")
+    print(f"   Parser overhead:           {median('parse_s'):.3f} ms")
+    print(f"   Fully parsed:              {sum(r['complete'] for r in runs)}/{len(runs)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Benchmark the compiled registry-item validator against per-record jsonschema.
+
+Generates millions of registry items in chunks by cloning the scraped
+components, with a share of them broken in the ways bad scrapes and bad
+generations break (missing keys, unknown types, empty files, a target that
+names another file, ...). Every chunk is validated with
+RegistryValidator.validate_batch, with validate() called per record, and with
+jsonschema's Draft7Validator on the same schema. jsonschema only checks the
+schema, not the cross-field rules, so it does strictly less work. It is run on
+a prefix of the records (--jsonschema-records) and its total is extrapolated.
+
+    python bench_validator.py --records 2000000 --invalid-rate 0.1
+"""
+import argparse
+import copy
+import json
+import random
+import time
+from collections import Counter
+from pathlib import Path
+
+from registry_validator import REGISTRY_ITEM_SCHEMA, RegistryValidator
+
+RAW_DATA = Path(__file__).resolve().parent.parent / "data/collection_scripts/data/raw"
+
+
+def _drop(key):
+    def mutate(item):
+        del item[key]
+    return mutate
+
+
+def _set(key, value):
+    def mutate(item):
+        item[key] = value
+    return mutate
+
+
+def _set_file(key, value):
+    def mutate(item):
+        item["files"][0][key] = value
+    return mutate
+
+
+def _page_without_target(item):
+    item["files"][0]["type"] = "registry:page"
+    del item["files"][0]["target"]
+
+
+MUTATIONS = {
+    "missing_name": _drop("name"),
+    "missing_files": _drop("files"),
+    "unknown_type": _set("type", "registry:widget"),
+    "wrong_schema": _set("$schema", "https://example.com/schema.json"),
+    "files_not_array": _set("files", {"path": "index.tsx"}),
+    "empty_files": _set("files", []),
+    "missing_content": lambda item: item["files"][0].pop("content"),
+    "empty_content": _set_file("content", ""),
+    "content_not_string": _set_file("content", None),
+    "target_mismatch": _set_file("target", "components/ui/other.tsx"),
+    "absolute_path": lambda item: item["files"][0].update(path="/" + item["files"][0]["path"]),
+    "page_without_target": _page_without_target,
+}
+
+
+def base_items():
+    """Registry items of the scraped components"""
+    records = json.loads((RAW_DATA / "aceternity.json").read_text(encoding="utf-8"))
+    magicui = json.loads((RAW_DATA / "magicui_full.json").read_text(encoding="utf-8"))
+    records += magicui["components"] if isinstance(magicui, dict) else magicui
+    return [json.loads(record["completion"]) for record in records]
+
+
+def synthetic_items(count: int, invalid_rate: float, rng: random.Random, bases=None):
+    """Fresh copies of the base items; about invalid_rate of them get a random mutation"""
+    bases = bases or base_items()
+    mutations = list(MUTATIONS.values())
+    items = []
+    for _ in range(count):
+        base = rng.choice(bases)
+        if rng.random() < invalid_rate:
+            item = copy.deepcopy(base)
+            rng.choice(mutations)(item)
+        else:
+            # New containers, shared strings: what json.loads of the same record would give, minus the copies
+            item = {**base, "files": [dict(file) for file in base["files"]]}
+        items.append(item)
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=2_000_000)
+    parser.add_argument("--chunk", type=int, default=100_000, help="records generated and validated at a time")
+    parser.add_argument("--invalid-rate", type=float, default=0.1)
+    parser.add_argument("--jsonschema-records", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    try:
+        from jsonschema import Draft7Validator
+        reference = Draft7Validator(REGISTRY_ITEM_SCHEMA)
+    except ImportError:
+        reference = None
+        print("⚠️ jsonschema is not installed (pip install jsonschema); only the compiled validator is timed")
+
+    rng = random.Random(args.seed)
+    bases = base_items()
+    batch_validator = RegistryValidator()
+    single_validator = RegistryValidator()
+    timings = Counter()
+    counted = Counter()
+    missed = Counter()  # codes of records jsonschema accepted but the compiled validator rejected
+    done = 0
+    while done < args.records:
+        items = synthetic_items(min(args.chunk, args.records - done), args.invalid_rate, rng, bases)
+
+        start = time.perf_counter()
+        results = batch_validator.validate_batch(items)
+        timings["batch"] += time.perf_counter() - start
+
+        validate = single_validator.validate
+        start = time.perf_counter()
+        for item in items:
+            validate(item)
+        timings["single"] += time.perf_counter() - start
+
+        remaining = args.jsonschema_records - counted["jsonschema"]
+        if reference is not None and remaining > 0:
+            sample = items[:remaining]
+            start = time.perf_counter()
+            reference_results = [list(reference.iter_errors(item)) for item in sample]
+            timings["jsonschema"] += time.perf_counter() - start
+            counted["jsonschema"] += len(sample)
+            counted["jsonschema_invalid"] += sum(1 for errors in reference_results if errors)
+            for errors, reference_errors in zip(results, reference_results):
+                if errors and not reference_errors:
+                    counted["missed"] += 1
+                    missed.update({error.code for error in errors})
+        done += len(items)
+
+    stats = batch_validator.stats
+    print(f"\n📊 {done:,} records, {stats['invalid']:,} invalid ({args.invalid_rate:.0%} mutated)")
+    print(f"{'validator':<28}{'records':>12}{'µs/record':>11}{'records/s':>12}{'total s':>9}")
+    rows = [("compiled, validate_batch", done, timings["batch"]), ("compiled, per record", done, timings["single"])]
+    if counted["jsonschema"]:
+        rows.append(("jsonschema, per record", counted["jsonschema"], timings["jsonschema"]))
+    for name, records, seconds in rows:
+        print(f"{name:<28}{records:>12,}{seconds / records * 1e6:>11.2f}{records / seconds:>12,.0f}{seconds:>9.1f}")
+    if counted["jsonschema"]:
+        per_record = timings["jsonschema"] / counted["jsonschema"]
+        print(f"\n  validate_batch is {per_record / (timings['batch'] / done):.1f}x faster than jsonschema per record; "
+              f"jsonschema would need ~{per_record * done:.0f} s for all {done:,} records")
+        print(f"  jsonschema rejected {counted['jsonschema_invalid']:,} of its {counted['jsonschema']:,} records; "
+              f"rules it cannot express caught {counted['missed']:,} more ({dict(missed)})")
+    codes = {code: count for code, count in stats.most_common() if code not in ("items", "invalid")}
+    print(f"  error codes: {codes}")
+
+
+if __name__ == "__main__":
+    main()
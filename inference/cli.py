@@ -1,31 +1,217 @@
 import gradio as gr
-import json
+import os
+import time
+from pathlib import Path
 
-def format_output(raw_json):
+from adapters import list_adapters
+from engine import InferenceEngine
+from json_repair import extract_registry_item
+from json_stream import IncrementalRegistryParser
+from registry_validator import RegistryValidator
+from response_cache import ResponseCache
+from retrieval import ComponentIndex, RetrievalRouter
+
+# Fine-tuned checkpoint written by training/finetune.ipynb (OUTPUT_DIR)
+MODEL_PATH = os.getenv("MODEL_PATH", "./shadcn-component-generator")
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "8"))
+MAX_WAIT_MS = float(os.getenv("MAX_WAIT_MS", "10"))
+CONSTRAINED_DECODING = os.getenv("CONSTRAINED_DECODING", "1") == "1"
+# Built with data/collection_scripts/build_index.py; close matches are served without generating
+RETRIEVAL_INDEX = Path(os.getenv(
+    "RETRIEVAL_INDEX",
+    Path(__file__).resolve().parent.parent / "data/collection_scripts/data/processed/component_index",
+))
+RETRIEVAL_THRESHOLD = float(os.getenv("RETRIEVAL_THRESHOLD", "0.8"))
+FEW_SHOT_EXAMPLES = int(os.getenv("FEW_SHOT_EXAMPLES", "1"))
+# LoRA adapters in ADAPTER_DIR/<name>/ (peft save_pretrained) are served on top of MODEL_PATH
+ADAPTER_DIR = os.getenv("ADAPTER_DIR")
+ADAPTER_MEMORY_MB = float(os.getenv("ADAPTER_MEMORY_MB", "256"))
+
+# Responses are cached per normalised prompt, generation params and model fingerprint
+# (on disk at RESPONSE_CACHE_PATH, default ~/.cache/shadcn-generator/responses.sqlite)
+response_cache = ResponseCache(
+    memory_items=int(os.getenv("CACHE_MEMORY_ITEMS", "1024")),
+    ttl_seconds=float(os.getenv("CACHE_TTL_HOURS", "168")) * 3600,
+    max_disk_bytes=int(os.getenv("CACHE_MAX_MB", "256")) * 1024 * 1024,
+)
+
+router = None
+if (RETRIEVAL_INDEX / "meta.json").exists():
+    router = RetrievalRouter(ComponentIndex(RETRIEVAL_INDEX), RETRIEVAL_THRESHOLD, FEW_SHOT_EXAMPLES)
+    print(f"✅ Retrieval index loaded: {router.index.num_docs} components")
+
+# Every item shown to users is checked; invalid ones come back as an error with the violations
+validator = RegistryValidator()
+
+engine = None
+
+def get_engine():
+    global engine
+    if engine is None:
+        engine = InferenceEngine.from_pretrained(
+            MODEL_PATH,
+            max_batch_size=MAX_BATCH_SIZE,
+            max_wait_ms=MAX_WAIT_MS,
+            constrained=CONSTRAINED_DECODING,
+            adapter_dir=ADAPTER_DIR,
+            adapter_memory_mb=ADAPTER_MEMORY_MB,
+        )
+        engine.start()
+    return engine
+
+def route(prompt, adapter=None):
+    """Return (stored completion or None, few-shot context) from the retrieval index"""
+    if router is None:
+        return None, ""
+    # Stored items are in the scraped styles, so a request for an adapter's style is always generated
+    return router.route(prompt, serve=adapter is None)
+
+def check_adapter(adapter):
+    """Error payload for an adapter that is not in ADAPTER_DIR, or None"""
+    if adapter is None:
+        return None
+    available = list_adapters(ADAPTER_DIR) if ADAPTER_DIR else []
+    if adapter not in available:
+        return {"error": f"Unknown adapter {adapter!r}", "available_adapters": available}
+    return None
+
+def cache_key(prompt, adapter=None):
+    eng = get_engine()
+    # Few-shot context depends on the index, so a rebuilt index invalidates entries
+    index_fingerprint = router.index.fingerprint if router is not None else None
+    # Likewise a retrained adapter
+    adapter_fingerprint = eng.adapters.fingerprint(adapter) if eng.adapters is not None else None
+    return response_cache.make_key(
+        prompt, eng.generation_defaults, f"{eng.fingerprint()}:{index_fingerprint}:{adapter_fingerprint}"
+    )
+
+def check_output(raw_output):
+    """Parse and validate a completion. Returns (registry item or error payload, valid)"""
+    result = extract_registry_item(raw_output)
+    if result.value is None:
+        return {"error": result.error, "raw_output": raw_output}, False
+    errors = validator.validate(result.value)
+    if errors:
+        print(f"⚠️ Invalid registry item: {', '.join(error.code for error in errors)}")
+        return {
+            "error": "Generated output is not a valid registry item",
+            "validation_errors": [error.as_dict() for error in errors],
+            "raw_output": raw_output,
+        }, False
+    return result.value, True
+
+def generate_shadcn_component(prompt, adapter=""):
+    adapter = adapter or None
+    error = check_adapter(adapter)
+    if error is not None:
+        return error
+    stored, context = route(prompt, adapter)
+    if stored is not None:
+        return check_output(stored)[0]
+    key = cache_key(prompt, adapter)
+    cached = response_cache.acquire(key)
+    if cached is not None:
+        return check_output(cached)[0]
+
+    completed = None
     try:
-        parsed = json.loads(raw_json)
-        return parsed
-    except json.JSONDecodeError:
-        # Try to extract JSON from malformed output
-        start = raw_json.find('{')
-        end = raw_json.rfind('}') + 1
-        if start != -1 and end != 0:
-            try:
-                return json.loads(raw_json[start:end])
-            except:
-                return {"error": "Could not parse JSON", "raw_output": raw_json}
-        return {"error": "No valid JSON found", "raw_output": raw_json}
-
-demo = gr.Interface(
-    fn=lambda x: format_output(generate_shadcn_component(x)),
-    inputs=gr.Textbox(lines=3, placeholder="Describe the component (e.g. 'Create an animated dropdown')"),
+        raw_output = get_engine().generate(prompt, context=context, adapter=adapter)
+        output, valid = check_output(raw_output)
+        # Invalid items are not cached, so asking again generates a new one
+        completed = raw_output if valid else None
+    finally:
+        response_cache.release(key, completed)
+    return output
+
+def stream_shadcn_component(prompt, adapter=""):
+    """Yield the registry item field by field while the model is still generating"""
+    adapter = adapter or None
+    error = check_adapter(adapter)
+    if error is not None:
+        yield error
+        return
+    stored, context = route(prompt, adapter)
+    if stored is not None:
+        yield check_output(stored)[0]
+        return
+
+    key = cache_key(prompt, adapter)
+    cached = response_cache.acquire(key)
+    if cached is not None:
+        yield check_output(cached)[0]
+        return
+
+    eng = get_engine()
+    # With constrained decoding the forced opening (up to the $schema field) arrives before any
+    # model output, so the first-field time starts counting after it
+    forced = len(eng.registry_fsm().forced_prefix) if eng.generation_defaults["constrained"] else 0
+    parser = IncrementalRegistryParser()
+    raw_output = ""
+    completed = None
+    start = time.perf_counter()
+    first_field = None
+
+    try:
+        for chunk in eng.stream(prompt, context=context, adapter=adapter):
+            raw_output += chunk
+            if parser.feed(chunk):
+                if first_field is None and len(raw_output) > forced:
+                    first_field = time.perf_counter() - start
+                yield parser.snapshot()
+        output, valid = check_output(raw_output)
+        # Invalid items are not cached, so asking again generates a new one
+        completed = raw_output if valid else None
+    finally:
+        # Also runs when the client disconnects, so waiting duplicates are never stranded
+        response_cache.release(key, completed)
+
+    total = time.perf_counter() - start
+    first_field_ms = f"{first_field * 1000:.0f} ms" if first_field is not None else "n/a"
+    print(f"⏱️ First field: {first_field_ms}, total: {total * 1000:.0f} ms")
+    yield output
+
+generator = gr.Interface(
+    fn=stream_shadcn_component,
+    inputs=[
+        gr.Textbox(lines=3, placeholder="Describe the component (e.g. 'Create an animated dropdown')"),
+        gr.Dropdown(
+            # Adapters added after startup can still be typed in; they are loaded on first use
+            choices=[""] + list_adapters(ADAPTER_DIR) if ADAPTER_DIR else [""],
+            value="",
+            allow_custom_value=True,
+            label="Style adapter (empty for the base model)",
+            visible=bool(ADAPTER_DIR),
+        ),
+    ],
     outputs=gr.JSON(),
     title="ShadCN Component Generator",
     examples=[
-        ["A horizontal scrolling marquee with pauseOnHover"],
-        ["A 3D card component with perspective effects"],
-        ["An animated toggle switch with accessibility support"]
+        ["A horizontal scrolling marquee with pauseOnHover", ""],
+        ["A 3D card component with perspective effects", ""],
+        ["An animated toggle switch with accessibility support", ""]
     ]
 )
 
-demo.launch(share=True)
\ No newline at end of file
+def serving_metrics():
+    return {
+        "cache": response_cache.metrics(),
+        "retrieval": router.stats if router is not None else None,
+        "prefix_cache": engine.prefix_cache.metrics() if engine is not None and engine.prefix_cache else None,
+        "adapters": engine.adapters.metrics() if engine is not None and engine.adapters else None,
+        "validation": dict(validator.stats),
+    }
+
+metrics = gr.Interface(
+    fn=serving_metrics,
+    inputs=None,
+    outputs=gr.JSON(),
+    title="Serving metrics",
+)
+
+demo = gr.TabbedInterface([generator, metrics], ["Generate", "Metrics"])
+
+if __name__ == "__main__":
+    get_engine()
+    # Gradio's own queue hands concurrent requests to the engine, which batches them
+    demo.queue(default_concurrency_limit=MAX_BATCH_SIZE * 2)
+    demo.launch(share=True)
@@ -0,0 +1,324 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict, defaultdict, deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import torch
+from transformers import LogitsProcessor
+
+from registry_validator import REGISTRY_TYPES, SCHEMA_URL
+
+# Bump whenever the grammar below changes so stale on-disk caches are ignored
+GRAMMAR_VERSION = "registry-item-v1"
+DEFAULT_CACHE_DIR = Path(os.getenv("FSM_CACHE_DIR", Path.home() / ".cache" / "shadcn-generator" / "fsm"))
+
+STOP_STRING = "<|endoftext|>"
+
+UNREACHABLE = 1 << 30
+
+
+class CharDFA:
+    """Character-level DFA. Each state has explicit transitions and an optional default
+    transition that applies to every other printable character (used for string bodies)."""
+
+    def __init__(self):
+        self.trans: List[Dict[str, int]] = []
+        self.default: List[Optional[int]] = []
+        self.accept = set()
+        self.start = self.new_state()
+
+    def new_state(self) -> int:
+        self.trans.append({})
+        self.default.append(None)
+        return len(self.trans) - 1
+
+    def literal(self, state: int, text: str, end: int = None) -> int:
+        """Add a fixed string starting at state, sharing existing literal prefixes"""
+        for i, ch in enumerate(text):
+            last = i == len(text) - 1
+            if last and end is not None:
+                self.trans[state][ch] = end
+                return end
+            nxt = self.trans[state].get(ch)
+            if nxt is None:
+                nxt = self.new_state()
+                self.trans[state][ch] = nxt
+            state = nxt
+        return state
+
+    def string_body(self, state: int) -> int:
+        """JSON string contents after the opening quote, up to and including the closing quote"""
+        body, escape, done = state, self.new_state(), self.new_state()
+        assert not self.trans[body], "string body must start from a fresh state"
+        self.trans[body] = {"\\": escape, '"': done}
+        self.default[body] = body
+        for ch in '"\\/bfnrt':
+            self.trans[escape][ch] = body
+        hex_state = self.new_state()
+        self.trans[escape]["u"] = hex_state
+        for i in range(4):
+            nxt = body if i == 3 else self.new_state()
+            for ch in "0123456789abcdefABCDEF":
+                self.trans[hex_state][ch] = nxt
+            hex_state = nxt
+        return done
+
+    def choice(self, state: int, options: List[str]) -> int:
+        end = self.new_state()
+        for option in options:
+            self.literal(state, option, end=end)
+        return end
+
+    def step(self, state: int, ch: str) -> Optional[int]:
+        nxt = self.trans[state].get(ch)
+        if nxt is None and ch >= " ":
+            nxt = self.default[state]
+        return nxt
+
+    def walk(self, state: int, text: str) -> Optional[int]:
+        for ch in text:
+            state = self.step(state, ch)
+            if state is None:
+                return None
+        return state
+
+
+def build_registry_dfa() -> CharDFA:
+    """The exact layout the scrapers emit with json.dumps(component_data, indent=2)"""
+    dfa = CharDFA()
+    s = dfa.literal(dfa.start, '{\n  "$schema": "' + SCHEMA_URL + '",\n  "name": "')
+    s = dfa.string_body(s)
+    s = dfa.literal(s, ',\n  "type": "')
+    s = dfa.choice(s, [t + '"' for t in REGISTRY_TYPES])
+    s = dfa.literal(s, ',\n  "title": "')
+    s = dfa.string_body(s)
+    s = dfa.literal(s, ',\n  "description": "')
+    s = dfa.string_body(s)
+    file_start = dfa.literal(s, ',\n  "files": [\n    {')
+    s = dfa.literal(file_start, '\n      "path": "')
+    s = dfa.string_body(s)
+    s = dfa.literal(s, ',\n      "content": "')
+    s = dfa.string_body(s)
+    s = dfa.literal(s, ',\n      "type": "')
+    s = dfa.choice(s, [t + '"' for t in REGISTRY_TYPES])
+    s = dfa.literal(s, ',\n      "target": "')
+    s = dfa.string_body(s)
+    file_end = dfa.literal(s, "\n    }")
+    dfa.literal(file_end, ",\n    {", end=file_start)
+    done = dfa.literal(file_end, "\n  ]\n}")
+    dfa.accept.add(done)
+    # The fine-tuned model ends completions with the literal training stop string
+    dfa.accept.add(dfa.literal(done, STOP_STRING))
+    return dfa
+
+
+def token_strings(tokenizer) -> List[Optional[str]]:
+    """Text each token contributes when appended to a sequence (None for special tokens)"""
+    special = set(tokenizer.all_special_ids)
+    tokens = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+    strings = []
+    for token_id, token in enumerate(tokens):
+        if token_id in special or token is None:
+            strings.append(None)
+            continue
+        text = tokenizer.convert_tokens_to_string([token])
+        # SentencePiece drops the word-boundary space when a token is decoded on its own
+        if token.startswith("▁") and not text.startswith(" "):
+            text = " " + text
+        strings.append(text or None)
+    return strings
+
+
+class TokenFSM:
+    """The character DFA lifted to token level for one tokenizer.
+
+    ``transitions[state]`` maps every token id allowed in that state to the next
+    state, and ``distance[state]`` is the fewest tokens needed to reach an accepting
+    state. Building these walks the whole vocabulary once per string-body state, so
+    the result is pickled to disk keyed by a hash of the vocabulary and grammar.
+    """
+
+    def __init__(self, transitions: List[Dict[int, int]], distance: List[int], accept, start: int, forced_prefix: str, eos_token_id: int):
+        self.transitions = transitions
+        self.distance = distance
+        self.accept = accept
+        self.start = start
+        self.forced_prefix = forced_prefix
+        self.eos_token_id = eos_token_id
+        self.done = len(transitions)  # virtual state after EOS
+        self._max_next_distance = [
+            max((distance[n] for n in table.values()), default=0) for table in transitions
+        ]
+        self._masks = {}
+        self._budget_masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_tokenizer(cls, tokenizer, cache_dir: Path = DEFAULT_CACHE_DIR) -> "TokenFSM":
+        strings = token_strings(tokenizer)
+        digest = hashlib.sha256()
+        digest.update(GRAMMAR_VERSION.encode())
+        digest.update(str(tokenizer.eos_token_id).encode())
+        for s in strings:
+            digest.update(b"\x00" if s is None else s.encode("utf-8", "surrogatepass") + b"\x01")
+        cache_path = Path(cache_dir) / f"{digest.hexdigest()[:32]}.pkl"
+
+        if cache_path.exists():
+            try:
+                with cache_path.open("rb") as f:
+                    return cls(**pickle.load(f))
+            except Exception as e:
+                print(f"⚠️ Ignoring unreadable FSM cache {cache_path}: {e}")
+
+        print("🔧 Compiling registry-item FSM against the tokenizer vocabulary...")
+        state = compile_fsm(build_registry_dfa(), strings, tokenizer.eos_token_id)
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            with tmp_path.open("wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp_path.replace(cache_path)
+            print(f"✅ FSM cached at {cache_path}")
+        except OSError as e:
+            print(f"⚠️ Could not cache FSM: {e}")
+        return cls(**state)
+
+    def next_state(self, state: int, token_id: int) -> int:
+        if state >= self.done or token_id == self.eos_token_id:
+            return self.done
+        # Tokens outside the table only appear if something bypassed the mask; finish the row
+        return self.transitions[state].get(token_id, self.done)
+
+    def mask(self, state: int, remaining: int, vocab_size: int, device) -> torch.Tensor:
+        """Boolean mask of tokens allowed in state with ``remaining`` tokens of budget left"""
+        if state >= self.done:
+            return self._cached(("done",), lambda: [self.eos_token_id], vocab_size, device)
+        if self._max_next_distance[state] < remaining:
+            return self._cached((state,), lambda: self._allowed(state), vocab_size, device)
+
+        # Near the end of the budget only keep tokens that can still close the object in time
+        key = (state, remaining)
+        with self._lock:
+            mask = self._budget_masks.get(key)
+            if mask is not None:
+                self._budget_masks.move_to_end(key)
+                return mask
+        allowed = [t for t, n in self.transitions[state].items() if self.distance[n] < remaining]
+        if state in self.accept:
+            allowed.append(self.eos_token_id)
+        mask = self._build(allowed or self._allowed(state), vocab_size, device)
+        with self._lock:
+            self._budget_masks[key] = mask
+            if len(self._budget_masks) > 4096:
+                self._budget_masks.popitem(last=False)
+        return mask
+
+    def _allowed(self, state: int) -> List[int]:
+        allowed = list(self.transitions[state])
+        if state in self.accept:
+            allowed.append(self.eos_token_id)
+        return allowed
+
+    def _cached(self, key, allowed_fn, vocab_size: int, device) -> torch.Tensor:
+        mask = self._masks.get(key)
+        if mask is None or mask.shape[0] != vocab_size or mask.device != device:
+            mask = self._build(allowed_fn(), vocab_size, device)
+            self._masks[key] = mask
+        return mask
+
+    @staticmethod
+    def _build(allowed: List[int], vocab_size: int, device) -> torch.Tensor:
+        mask = torch.zeros(vocab_size, dtype=torch.bool, device=device)
+        ids = torch.tensor([t for t in allowed if t < vocab_size], dtype=torch.long, device=device)
+        mask[ids] = True
+        return mask
+
+
+def compile_fsm(dfa: CharDFA, strings: List[Optional[str]], eos_token_id: int) -> Dict:
+    """Walk every token from every DFA state and record where it lands"""
+    by_first_char = defaultdict(list)
+    all_tokens = []
+    for token_id, text in enumerate(strings):
+        if text:
+            by_first_char[text[0]].append(token_id)
+            all_tokens.append(token_id)
+
+    # Skip the fully determined opening boilerplate; the engine appends it to the prompt
+    state, forced = dfa.start, []
+    while dfa.default[state] is None and len(dfa.trans[state]) == 1 and state not in dfa.accept:
+        ch, state = next(iter(dfa.trans[state].items()))
+        forced.append(ch)
+
+    transitions = []
+    for s in range(len(dfa.trans)):
+        if dfa.default[s] is None:
+            candidates = [t for ch in dfa.trans[s] for t in by_first_char.get(ch, ())]
+        else:
+            candidates = all_tokens
+        table = {}
+        for token_id in candidates:
+            nxt = dfa.walk(s, strings[token_id])
+            if nxt is not None:
+                table[token_id] = nxt
+        transitions.append(table)
+
+    # Fewest tokens from each state to an accepting one, by BFS over reversed edges
+    reverse = defaultdict(set)
+    for s, table in enumerate(transitions):
+        for nxt in set(table.values()):
+            reverse[nxt].add(s)
+    distance = [UNREACHABLE] * len(transitions)
+    queue = deque()
+    for s in dfa.accept:
+        distance[s] = 0
+        queue.append(s)
+    while queue:
+        s = queue.popleft()
+        for prev in reverse[s]:
+            if distance[prev] == UNREACHABLE:
+                distance[prev] = distance[s] + 1
+                queue.append(prev)
+
+    return {
+        "transitions": transitions,
+        "distance": distance,
+        "accept": set(dfa.accept),
+        "start": state,
+        "forced_prefix": "".join(forced),
+        "eos_token_id": eos_token_id,
+    }
+
+
+class RegistryItemLogitsProcessor(LogitsProcessor):
+    """Masks logits so every sampled sequence follows the registry-item layout.
+
+    Per step, each row costs one dict lookup to advance its state and one cached
+    mask lookup. Where the grammar allows a single continuation (fixed keys,
+    punctuation) only that token survives, so it is emitted without sampling. The
+    processor also tracks the remaining ``max_new_tokens`` budget and steers
+    towards closing the object in time instead of getting cut off mid-string.
+    """
+
+    def __init__(self, fsm: TokenFSM, max_new_tokens: int):
+        self.fsm = fsm
+        self.max_new_tokens = max_new_tokens
+        self.prompt_len = None
+        self.states = None
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        if self.prompt_len is None:
+            self.prompt_len = input_ids.shape[1]
+            self.states = [self.fsm.start] * input_ids.shape[0]
+        else:
+            for row, token_id in enumerate(input_ids[:, -1].tolist()):
+                self.states[row] = self.fsm.next_state(self.states[row], token_id)
+
+        remaining = self.max_new_tokens - (input_ids.shape[1] - self.prompt_len)
+        vocab_size = scores.shape[-1]
+        masks = torch.stack([
+            self.fsm.mask(state, remaining, vocab_size, scores.device) for state in self.states
+        ])
+        return scores.masked_fill(~masks, float("-inf"))
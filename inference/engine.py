@@ -0,0 +1,539 @@
+import hashlib
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import torch
+from transformers import (
+    AutoModelForCausalLM,
+    AutoTokenizer,
+    LogitsProcessorList,
+    StoppingCriteria,
+    StoppingCriteriaList,
+    TextIteratorStreamer,
+)
+from transformers.generation.streamers import BaseStreamer
+
+from adapters import AdapterLoadError, AdapterPool
+from constrained import DEFAULT_CACHE_DIR, RegistryItemLogitsProcessor, TokenFSM
+from export_cpu import is_cpu_export, load_int8
+from ngram_index import NgramDrafter, NgramIndex
+from prefix_cache import PrefixKVCache
+from speculative import speculative_generate
+
+# Same framing format_dataset trains on
+PROMPT_TEMPLATE = "<|prompt|>{prompt}<|completion|>"
+STOP_STRING = "<|endoftext|>"
+
+DEFAULT_GENERATION_PARAMS = {
+    "max_new_tokens": 512,
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "do_sample": True,
+    # Mask logits to the registry-item layout (see constrained.py)
+    "constrained": False,
+    # Greedy, unstreamed batches of one only: verify n-gram drafts in one forward pass (see speculative.py)
+    "speculative": False,
+}
+
+_SHUTDOWN = object()
+
+
+def format_prompt(prompt: str, context: str = "") -> str:
+    """Wrap a user prompt in the training template, after any few-shot context"""
+    return context + PROMPT_TEMPLATE.format(prompt=prompt.strip())
+
+
+class RequestStreamer(TextIteratorStreamer):
+    """Text of one row of a batched generate call, fed by BatchStreamer; the reader can cancel it"""
+
+    def __init__(self, tokenizer):
+        # BatchStreamer already drops the prompt, so every token put here is new text
+        super().__init__(tokenizer, skip_prompt=False, skip_special_tokens=True)
+        self.cancelled = threading.Event()
+        self.finished = False
+
+    def end(self):
+        if not self.finished:
+            self.finished = True
+            super().end()
+
+
+class BatchStreamer(BaseStreamer):
+    """Fans the new tokens of a batched generate call out to the rows that are streamed"""
+
+    def __init__(self, streamers: List[Optional[RequestStreamer]], eos_token_id: int):
+        self.streamers = streamers
+        self.eos_token_id = eos_token_id
+        self.prompt_seen = False
+
+    def put(self, value):
+        if not self.prompt_seen:
+            # generate() passes the prompt ids first
+            self.prompt_seen = True
+            return
+        for streamer, tokens in zip(self.streamers, value.reshape(len(self.streamers), -1).tolist()):
+            if streamer is None or streamer.finished:
+                continue
+            if self.eos_token_id in tokens:
+                # Finished rows keep receiving padding until the whole batch is done
+                tokens = tokens[:tokens.index(self.eos_token_id)]
+                if tokens:
+                    streamer.put(torch.tensor(tokens))
+                streamer.end()
+            elif streamer.cancelled.is_set():
+                streamer.end()
+            else:
+                streamer.put(torch.tensor(tokens))
+
+    def end(self):
+        for streamer in self.streamers:
+            if streamer is not None:
+                streamer.end()
+
+
+class CancelledRows(StoppingCriteria):
+    """Stops the rows whose streaming client went away, so they stop costing decode steps"""
+
+    def __init__(self, streamers: List[Optional[RequestStreamer]]):
+        self.streamers = streamers
+
+    def __call__(self, input_ids, scores, **kwargs):
+        cancelled = [s is not None and s.cancelled.is_set() for s in self.streamers]
+        return torch.tensor(cancelled, dtype=torch.bool, device=input_ids.device)
+
+
+class GenerationRequest:
+    """A queued prompt waiting to be picked up by the batching worker"""
+
+    __slots__ = ("prompt", "context", "adapter", "params", "streamer", "future", "enqueued_at")
+
+    def __init__(
+        self,
+        prompt: str,
+        params: Dict,
+        streamer: Optional[RequestStreamer] = None,
+        context: str = "",
+        adapter: Optional[str] = None,
+    ):
+        self.prompt = prompt
+        self.context = context
+        self.adapter = adapter
+        self.params = params
+        self.streamer = streamer
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceEngine:
+    """Loads the model once and serves concurrent requests with dynamic micro-batching.
+
+    Callers submit prompts from any thread. A single worker thread drains the queue,
+    waits at most ``max_wait_ms`` after the first request for more to arrive, and runs
+    up to ``max_batch_size`` prompts through one left-padded ``generate`` call.
+    Streamed and blocking requests share batches; streamed rows get their tokens
+    fanned out as they are decoded.
+    """
+
+    def __init__(
+        self,
+        model,
+        tokenizer,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 10.0,
+        max_prompt_tokens: int = 2048,
+        fsm_cache_dir: str = DEFAULT_CACHE_DIR,
+        ngram_index_path: Optional[str] = None,
+        num_draft_tokens: int = 8,
+        prefix_cache_tokens: int = 8192,
+        prefix_block_size: int = 16,
+        adapter_dir: Optional[str] = None,
+        adapter_memory_mb: float = 256,
+        **generation_defaults,
+    ):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.model_path = None
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_prompt_tokens = max_prompt_tokens
+        self.fsm_cache_dir = fsm_cache_dir
+        self.ngram_index = NgramIndex(ngram_index_path) if ngram_index_path else None
+        self.num_draft_tokens = num_draft_tokens
+        # Reuses the KV of registered and frequently seen prompt prefixes; 0 disables it
+        self.prefix_cache = (
+            PrefixKVCache(model, block_size=prefix_block_size, max_tokens=prefix_cache_tokens)
+            if prefix_cache_tokens
+            else None
+        )
+        self.generation_defaults = {**DEFAULT_GENERATION_PARAMS, **generation_defaults}
+
+        # Decoder-only models need left padding so every row ends at the same position
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.tokenizer.padding_side = "left"
+        # Over-long few-shot context is cut from the front so the user prompt survives
+        self.tokenizer.truncation_side = "left"
+        self.model.eval()
+
+        # Per-request LoRA adapters on top of this model (see adapters.py)
+        self.adapters = AdapterPool(model, adapter_dir, int(adapter_memory_mb * 1024 * 1024)) if adapter_dir else None
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._fsm = None
+        self.stats = {"batches": 0, "requests": 0, "cancelled": 0, "drafted": 0, "accepted": 0}
+
+    @classmethod
+    def from_pretrained(cls, model_path: str, **kwargs) -> "InferenceEngine":
+        """Load the fine-tuned checkpoint (or any causal LM) and wrap it in an engine"""
+        print(f"🔄 Loading model: {model_path}")
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        if is_cpu_export(model_path):
+            # int8 artifact written by export_cpu.py
+            model = load_int8(model_path)
+        else:
+            model = AutoModelForCausalLM.from_pretrained(
+                model_path,
+                torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
+                device_map="auto" if torch.cuda.is_available() else None,
+            )
+        print("✅ Model loaded")
+        engine = cls(model, tokenizer, **kwargs)
+        engine.model_path = model_path
+        return engine
+
+    # --------------------------
+    # Public API
+    # --------------------------
+
+    def start(self):
+        """Start the batching worker if it is not already running"""
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="inference-engine", daemon=True)
+                self._worker.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Finish queued requests and stop the worker"""
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None:
+            self._queue.put(_SHUTDOWN)
+            worker.join(timeout)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def submit(self, prompt: str, context: str = "", adapter: Optional[str] = None, **params) -> Future:
+        """Queue a prompt and return a Future that resolves to the completion text"""
+        self.start()
+        request = GenerationRequest(prompt, self._resolve_params(params), context=context, adapter=adapter)
+        self._queue.put(request)
+        return request.future
+
+    def register_prefix(self, text: str) -> int:
+        """Precompute and keep the KV cache of a static prompt prefix (template, preamble, few-shot block)"""
+        if self.prefix_cache is None:
+            raise RuntimeError("prefix cache is disabled (prefix_cache_tokens=0)")
+        return self.prefix_cache.register(self.tokenizer(text)["input_ids"])
+
+    def generate(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        context: str = "",
+        adapter: Optional[str] = None,
+        **params,
+    ) -> str:
+        """Blocking helper around submit() for callers like the Gradio handler"""
+        return self.submit(prompt, context=context, adapter=adapter, **params).result(timeout)
+
+    def stream(self, prompt: str, context: str = "", adapter: Optional[str] = None, **params) -> Iterator[str]:
+        """Yield completion text as it is generated instead of waiting for the whole output"""
+        self.start()
+        streamer = RequestStreamer(self.tokenizer)
+        request = GenerationRequest(prompt, self._resolve_params(params), streamer, context, adapter)
+        self._queue.put(request)
+
+        done = False
+        try:
+            # The forced opening boilerplate is part of the prompt, so the streamer skips it
+            if request.params["constrained"]:
+                yield self.registry_fsm().forced_prefix
+
+            # Hold back just enough text to never leak a partially streamed stop string
+            holdback = len(STOP_STRING) - 1
+            pending = ""
+            for chunk in streamer:
+                pending += chunk
+                stop = pending.find(STOP_STRING)
+                if stop != -1:
+                    pending = pending[:stop]
+                    break
+                if len(pending) > holdback:
+                    yield pending[:-holdback]
+                    pending = pending[-holdback:]
+            if pending:
+                yield pending
+            done = True
+        finally:
+            if not done:
+                # The caller stopped reading (e.g. the client disconnected): free the row
+                streamer.cancelled.set()
+
+        # Surface generation errors to the caller
+        request.future.result()
+
+    @torch.no_grad()
+    def generate_batch(
+        self,
+        prompts: List[str],
+        streamers: Optional[List[Optional[RequestStreamer]]] = None,
+        contexts: Optional[List[str]] = None,
+        adapters: Optional[List[Optional[str]]] = None,
+        **params,
+    ) -> List[str]:
+        """Run one batched generate call for prompts sharing the same parameters.
+
+        Rows may name different LoRA adapters (None for the base model) and may be
+        streamed (a RequestStreamer, or None for rows only returned at the end).
+        """
+        params = self._resolve_params(params)
+        contexts = contexts or [""] * len(prompts)
+        adapters = adapters or [None] * len(prompts)
+        if self.adapters is not None and any(adapters):
+            self.model = self.adapters.acquire(a for a in adapters if a)
+        prefix = ""
+        fsm = None
+        logits_processor = LogitsProcessorList()
+        if params.pop("constrained"):
+            fsm = self.registry_fsm()
+            # Fixed opening boilerplate is prefilled in one pass instead of decoded token by token
+            prefix = fsm.forced_prefix
+            logits_processor.append(RegistryItemLogitsProcessor(fsm, params["max_new_tokens"]))
+
+        streamer = None
+        stopping_criteria = StoppingCriteriaList()
+        if streamers is not None and any(s is not None for s in streamers):
+            streamer = BatchStreamer(streamers, self.tokenizer.eos_token_id)
+            stopping_criteria.append(CancelledRows(streamers))
+
+        # Drafts are verified per row, so a batch would decode its rows one after another
+        speculative = params.pop("speculative") and not params.get("do_sample")
+        if speculative and streamer is None and len(prompts) == 1:
+            text = format_prompt(prompts[0], contexts[0]) + prefix
+            return [self._generate_speculative(text, params, prefix, fsm, adapters[0])]
+
+        inputs, past_key_values = self._prepare_inputs(
+            [format_prompt(p, c) + prefix for p, c in zip(prompts, contexts)], adapters
+        )
+        outputs = self.model.generate(
+            **inputs,
+            **self._generate_kwargs(params),
+            **self._adapter_kwargs(adapters),
+            past_key_values=past_key_values,
+            streamer=streamer,
+            logits_processor=logits_processor,
+            stopping_criteria=stopping_criteria,
+        )
+        return self._decode(outputs[:, inputs["input_ids"].shape[1]:], prefix)
+
+    def _generate_speculative(
+        self,
+        text: str,
+        params: Dict,
+        prefix: str,
+        fsm: Optional[TokenFSM],
+        adapter: Optional[str] = None,
+    ) -> str:
+        """Greedy generation for one formatted prompt with n-gram drafts from the prompt and corpus index"""
+        inputs, past_key_values = self._prepare_inputs([text], [adapter])
+        input_ids = inputs["input_ids"]
+
+        drafter = NgramDrafter(self.ngram_index, num_draft=self.num_draft_tokens)
+        tokens, stats = speculative_generate(
+            self.model,
+            input_ids,
+            params["max_new_tokens"],
+            drafter,
+            self.tokenizer.eos_token_id,
+            fsm=fsm,
+            should_stop=self._hit_stop_string,
+            past_key_values=past_key_values,
+            forward_kwargs=self._adapter_kwargs([adapter]),
+        )
+        self.stats["drafted"] += stats["drafted"]
+        self.stats["accepted"] += stats["accepted"]
+        return self._decode([tokens], prefix)[0]
+
+    def _hit_stop_string(self, tokens: List[int]) -> bool:
+        return STOP_STRING in self.tokenizer.decode(tokens[-16:])
+
+    def fingerprint(self) -> str:
+        """Identity of the loaded weights (file names, sizes, mtimes), used to key cached responses"""
+        digest = hashlib.sha256(self.model.config.to_json_string().encode())
+        path = Path(self.model_path) if self.model_path else None
+        if path is not None and path.is_dir():
+            for file in sorted(path.rglob("*")):
+                if file.is_file() and file.suffix in (".json", ".safetensors", ".bin", ".model", ".pt"):
+                    stat = file.stat()
+                    digest.update(f"{file.relative_to(path)}:{stat.st_size}:{int(stat.st_mtime)}\n".encode())
+        elif self.model_path:
+            digest.update(str(self.model_path).encode())
+        return digest.hexdigest()[:16]
+
+    def registry_fsm(self) -> TokenFSM:
+        """Token-level registry-item FSM, compiled on first use and cached on disk"""
+        with self._lock:
+            if self._fsm is None:
+                self._fsm = TokenFSM.for_tokenizer(self.tokenizer, self.fsm_cache_dir)
+            return self._fsm
+
+    # --------------------------
+    # Internals
+    # --------------------------
+
+    def _prepare_inputs(self, texts: List[str], adapters: List[Optional[str]]):
+        """Tokenize a batch, reusing the longest cached prefix shared by every row.
+
+        Rows are laid out as [shared prefix][padding][suffix]: the cached prefix KV
+        sits at the same positions in every row and the attention mask hides the
+        padding. Without a cache hit this is plain left padding. Prefix KV depends
+        on the adapter, so only batches on a single adapter (version) reuse it.
+        """
+        rows = self.tokenizer(texts, truncation=True, max_length=self.max_prompt_tokens)["input_ids"]
+        prefix_len, past_key_values = 0, None
+        if self.prefix_cache is not None and len(set(adapters)) == 1:
+            adapter = adapters[0]
+            # Once adapters are loaded this is the PeftModel, which needs adapter_names on every forward
+            self.prefix_cache.model = self.model
+            prefix_len, past_key_values = self.prefix_cache.lookup(
+                rows,
+                namespace=self.adapters.loaded_fingerprint(adapter) if adapter else None,
+                forward_kwargs=self._adapter_kwargs([adapter]),
+            )
+
+        width = prefix_len + max(len(row) - prefix_len for row in rows)
+        input_ids = torch.full((len(rows), width), self.tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        for i, row in enumerate(rows):
+            suffix = row[prefix_len:]
+            input_ids[i, :prefix_len] = torch.tensor(row[:prefix_len])
+            input_ids[i, width - len(suffix):] = torch.tensor(suffix)
+            attention_mask[i, :prefix_len] = 1
+            attention_mask[i, width - len(suffix):] = 1
+        inputs = {"input_ids": input_ids.to(self.model.device), "attention_mask": attention_mask.to(self.model.device)}
+        return inputs, past_key_values
+
+    def _adapter_kwargs(self, adapters: List[Optional[str]]) -> Dict:
+        return self.adapters.forward_kwargs(adapters) if self.adapters is not None else {}
+
+    def _resolve_params(self, params: Dict) -> Dict:
+        resolved = {**self.generation_defaults, **params}
+        if not resolved.get("do_sample"):
+            # Sampling knobs are ignored (and warned about) under greedy decoding
+            resolved.pop("temperature", None)
+            resolved.pop("top_p", None)
+        return resolved
+
+    def _generate_kwargs(self, params: Dict) -> Dict:
+        return {
+            **params,
+            "pad_token_id": self.tokenizer.pad_token_id,
+            "eos_token_id": self.tokenizer.eos_token_id,
+            "stop_strings": [STOP_STRING],
+            "tokenizer": self.tokenizer,
+        }
+
+    def _decode(self, new_tokens, prefix: str = "") -> List[str]:
+        texts = self.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
+        return [(prefix + text.split(STOP_STRING)[0]).strip() for text in texts]
+
+    def _collect_batch(self) -> List:
+        """Block for the first request, then gather more until the batch is full or the deadline passes"""
+        batch = [self._queue.get()]
+        if batch[0] is _SHUTDOWN:
+            return batch
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            if item is _SHUTDOWN:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            shutdown = batch[-1] is _SHUTDOWN
+            requests = [r for r in batch if r is not _SHUTDOWN]
+
+            # Only requests with identical generation parameters can share a generate call
+            groups = {}
+            for request in requests:
+                if request.streamer is not None and request.streamer.cancelled.is_set():
+                    # Abandoned while queued
+                    request.streamer.end()
+                    request.future.cancel()
+                    self.stats["cancelled"] += 1
+                    continue
+                key = tuple(sorted(request.params.items()))
+                groups.setdefault(key, []).append(request)
+
+            for group in groups.values():
+                self._run_group(group)
+
+            if shutdown:
+                break
+
+    def _run_group(self, group: List[GenerationRequest]):
+        while group:
+            try:
+                results = self.generate_batch(
+                    [r.prompt for r in group],
+                    streamers=[r.streamer for r in group],
+                    contexts=[r.context for r in group],
+                    adapters=[r.adapter for r in group],
+                    **group[0].params,
+                )
+                break
+            except AdapterLoadError as e:
+                # Only the rows that need a broken adapter fail; the rest of the batch runs without them
+                for request in group:
+                    if request.adapter in e.failures:
+                        self._fail([request], AdapterLoadError({request.adapter: e.failures[request.adapter]}))
+                group = [r for r in group if r.adapter not in e.failures]
+            except Exception as e:
+                self._fail(group, e)
+                return
+        if not group:
+            return
+
+        self.stats["batches"] += 1
+        self.stats["requests"] += len(group)
+        for request, text in zip(group, results):
+            request.future.set_result(text)
+
+    @staticmethod
+    def _fail(requests: List[GenerationRequest], error: Exception):
+        for request in requests:
+            if request.streamer is not None:
+                request.streamer.end()
+            request.future.set_exception(error)
@@ -0,0 +1,120 @@
+"""Export the fine-tuned model as an int8 CPU artifact.
+
+Merges the LoRA adapter that training/finetune.ipynb saves to OUTPUT_DIR into
+its base model, applies dynamic int8 quantization to every Linear layer and
+writes the result where InferenceEngine.from_pretrained picks it up:
+
+    python export_cpu.py --model ./shadcn-component-generator --out ./shadcn-component-generator-int8
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+import torch
+from transformers import AutoConfig, AutoModelForCausalLM, AutoTokenizer
+
+EXPORT_MARKER = "cpu_export.json"
+WEIGHTS_NAME = "model_int8.pt"
+
+
+def is_cpu_export(model_path: str) -> bool:
+    return (Path(model_path) / EXPORT_MARKER).exists()
+
+
+def load_merged(model_path: str, base_model: Optional[str] = None):
+    """Load a checkpoint in fp32 on CPU, merging it into its base model if it is a LoRA adapter"""
+    adapter_config = Path(model_path) / "adapter_config.json"
+    if not adapter_config.exists():
+        return AutoModelForCausalLM.from_pretrained(model_path, torch_dtype=torch.float32)
+
+    from peft import PeftModel
+
+    base_model = base_model or json.loads(adapter_config.read_text())["base_model_name_or_path"]
+    print(f"🔄 Merging LoRA adapter {model_path} into {base_model}")
+    base = AutoModelForCausalLM.from_pretrained(base_model, torch_dtype=torch.float32)
+    return PeftModel.from_pretrained(base, model_path).merge_and_unload()
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization: weights stored as int8, activations quantized per batch.
+
+    Linear layers are swapped in place, so each fp32 weight is freed as soon as
+    its int8 copy exists instead of holding both models at once.
+    """
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _int8_skeleton(model):
+    """Swap every Linear for an empty dynamic int8 Linear, matching what quantize_int8 produces"""
+    for module in list(model.modules()):
+        for name, child in list(module.named_children()):
+            # quantize_dynamic maps exact types only, so subclasses are left alone here too
+            if type(child) is torch.nn.Linear:
+                setattr(module, name, torch.ao.nn.quantized.dynamic.Linear(
+                    child.in_features, child.out_features, bias_=child.bias is not None, dtype=torch.qint8
+                ))
+    return model
+
+
+def export_int8(model_path: str, out_dir: str, base_model: Optional[str] = None) -> Path:
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    model = quantize_int8(load_merged(model_path, base_model))
+
+    # Quantized modules have no safetensors form, so save the config and a plain state dict
+    model.config.save_pretrained(out)
+    AutoTokenizer.from_pretrained(model_path).save_pretrained(out)
+    torch.save(model.state_dict(), out / WEIGHTS_NAME)
+    (out / EXPORT_MARKER).write_text(json.dumps({
+        "format": "int8-dynamic",
+        "source": str(model_path),
+        "torch": torch.__version__,
+    }, indent=2))
+    return out
+
+
+def load_int8(model_path: str):
+    """Rebuild the quantized module tree from the config and load the exported weights.
+
+    The skeleton is built with its parameters on the meta device, so the fp32
+    model is never allocated. Only the int8 Linear layers and the loaded tensors
+    take memory.
+    """
+    from accelerate import init_empty_weights
+
+    config = AutoConfig.from_pretrained(model_path)
+    # Buffers stay real: non-persistent ones such as the rotary inv_freq are not in the state dict
+    with init_empty_weights(include_buffers=False):
+        model = AutoModelForCausalLM.from_config(config, torch_dtype=torch.float32)
+    model = _int8_skeleton(model)
+    # Packed int8 weights are pickled objects; the artifact is produced locally by export_int8
+    state = torch.load(Path(model_path) / WEIGHTS_NAME, map_location="cpu", weights_only=False)
+    # assign=True replaces the meta parameters with the loaded tensors instead of copying into them
+    model.load_state_dict(state, assign=True)
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise ValueError(f"{model_path}: no weights for {missing[:5]}")
+    return model.eval()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="./shadcn-component-generator", help="OUTPUT_DIR of the notebook")
+    parser.add_argument("--out", default="./shadcn-component-generator-int8")
+    parser.add_argument(
+        "--base-model",
+        help="full-precision base to merge into (e.g. when the adapter was trained on a 4-bit checkpoint)",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    out = export_int8(args.model, args.out, args.base_model)
+    size_mb = (out / WEIGHTS_NAME).stat().st_size / 1e6
+    print(f"✅ Exported int8 model ({size_mb:.1f} MB) to {out} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+import json
+import re
+from typing import List, Optional, Tuple
+
+# Outside strings only brackets, quotes, colons and commas matter
+_STRUCTURAL = re.compile(r'[{}\[\]",:]')
+# Unrolled string body: runs of plain characters separated by escapes, up to the closing quote
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_DANGLING_ESCAPE = re.compile(r'(\\+)(u[0-9a-fA-F]{0,3})?$')
+_PARTIAL_NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][-+]?\d+)?")
+_CLOSER = {"{": "}", "[": "]"}
+
+REGISTRY_KEYS = ("$schema", "name", "files")
+
+# A candidate that fails to parse is retried from its next character this many times.
+# This handles a stray "{" in chatter that swallows the real object while keeping the
+# worst case a small constant number of passes over the text.
+MAX_RESTARTS = 4
+
+
+class ExtractionResult:
+    """Outcome of extract_registry_item: the parsed value plus what had to be fixed"""
+
+    def __init__(self, value=None, repairs: Optional[List[str]] = None, span: Tuple[int, int] = (0, 0), error: str = None):
+        self.value = value
+        self.repairs = repairs or []
+        self.span = span
+        self.error = error
+
+    @property
+    def repaired(self) -> bool:
+        return bool(self.repairs)
+
+    def __repr__(self):
+        return f"ExtractionResult(span={self.span}, repairs={self.repairs}, error={self.error!r})"
+
+
+def is_registry_item(value) -> bool:
+    return isinstance(value, dict) and any(key in value for key in REGISTRY_KEYS)
+
+
+class _Candidate:
+    """Scan state for one top-level object starting at ``start``"""
+
+    def __init__(self, start: int):
+        self.start = start
+        self.stack = ["{"]
+        self.last = "{"  # last significant token: { [ , : key value
+        self.last_pos = start
+        self.edits: List[Tuple[int, int, str]] = []  # (position, chars to delete, text to insert)
+        self.repairs: List[str] = []
+
+    def apply(self, text: str, end: int, suffix: str = "") -> str:
+        """Rebuild the candidate text with the recorded edits in one pass"""
+        pieces, cursor = [], self.start
+        for pos, delete, insert in sorted(self.edits, key=lambda edit: edit[0]):
+            pieces.append(text[cursor:pos])
+            pieces.append(insert)
+            cursor = pos + delete
+        pieces.append(text[cursor:end])
+        pieces.append(suffix)
+        return "".join(pieces)
+
+
+def _loads(text: str):
+    # strict=False accepts raw newlines and tabs inside strings, which models emit often
+    return json.loads(text, strict=False)
+
+
+def extract_registry_item(text: str) -> ExtractionResult:
+    """Find, repair and parse the first registry-item object in raw model output.
+
+    The text is scanned left to right with the regex engine jumping between
+    structural characters, so large ``content`` strings are skipped at C speed.
+    Quotes and brackets in chatter outside any object are ignored. Every balanced
+    top-level object is parsed once and the first one that looks like a registry
+    item wins. Trailing commas and mismatched closers are fixed on the way. If the
+    text ends inside an object, the open string is closed, a dangling key or
+    partial literal is completed and the missing brackets are appended. Every fix
+    is listed in ``repairs``.
+    """
+    # Most outputs are already a valid item; one json.loads is cheaper than scanning them
+    try:
+        value = _loads(text)
+    except json.JSONDecodeError:
+        value = None
+    if is_registry_item(value):
+        start = len(text) - len(text.lstrip())
+        return ExtractionResult(value, [], (start, len(text.rstrip())))
+
+    fallback = None
+    start = 0
+    for _ in range(MAX_RESTARTS + 1):
+        result, failed_start = _scan(text, start)
+        if is_registry_item(result.value):
+            return result
+        if fallback is None or (fallback.value is None and result.value is not None):
+            fallback = result
+        if failed_start is None:
+            break
+        start = failed_start + 1
+    return fallback
+
+
+def _scan(text: str, pos: int):
+    """Single pass from pos. Returns (best result, start of the first candidate that failed to parse)"""
+    first_result = None
+    failed_start = None
+    candidate = None
+    n = len(text)
+
+    while pos < n:
+        if candidate is None:
+            pos = text.find("{", pos)
+            if pos == -1:
+                break
+            candidate = _Candidate(pos)
+            pos += 1
+            continue
+
+        match = _STRUCTURAL.search(text, pos)
+        if match is None:
+            break
+        i, ch = match.start(), match.group()
+
+        if ch == '"':
+            end = _scan_string(text, i + 1)
+            if end == -1:
+                result = _finish_truncated(text, candidate, string_start=i)
+                if result.value is None and failed_start is None:
+                    failed_start = candidate.start
+                return _prefer(first_result, result), failed_start
+            in_object = candidate.stack[-1] == "{"
+            candidate.last = "key" if in_object and candidate.last in ("{", ",") else "value"
+            candidate.last_pos = end
+            pos = end + 1
+            continue
+
+        if ch in "{[":
+            candidate.stack.append(ch)
+            candidate.last = ch
+        elif ch in ",:":
+            candidate.last = ch
+        else:
+            _close(text, candidate, i, ch)
+            candidate.last = "value"
+            if not candidate.stack:
+                result = _finish_balanced(text, candidate, i + 1)
+                if is_registry_item(result.value):
+                    return result, failed_start
+                if result.value is None and failed_start is None:
+                    failed_start = candidate.start
+                first_result = _prefer(first_result, result)
+                candidate = None
+        if candidate is not None:
+            candidate.last_pos = i
+        pos = i + 1
+
+    if candidate is not None:
+        result = _finish_truncated(text, candidate)
+        if result.value is None and failed_start is None:
+            failed_start = candidate.start
+        return _prefer(first_result, result), failed_start
+    if first_result is None:
+        return ExtractionResult(error="No valid JSON found"), failed_start
+    return first_result, failed_start
+
+
+def _prefer(current: Optional[ExtractionResult], new: ExtractionResult) -> ExtractionResult:
+    """Keep the earliest result, unless a later one is a registry item or the earlier one failed"""
+    if current is None or is_registry_item(new.value) or (current.value is None and new.value is not None):
+        return new
+    return current
+
+
+def _scan_string(text: str, pos: int) -> int:
+    """Return the index of the closing quote of a string whose body starts at pos, or -1"""
+    match = _STRING_BODY.match(text, pos)
+    return match.end() - 1 if match else -1
+
+
+def _close(text: str, candidate: _Candidate, i: int, ch: str):
+    """Handle a closing bracket, fixing trailing commas and mismatched closers"""
+    if candidate.last == "," and not text[candidate.last_pos + 1:i].strip():
+        candidate.edits.append((candidate.last_pos, 1, ""))
+        candidate.repairs.append("removed trailing comma")
+
+    opener = "{" if ch == "}" else "["
+    if candidate.stack[-1] == opener:
+        candidate.stack.pop()
+        return
+
+    if opener in candidate.stack:
+        # Close whatever was left open inside the container this bracket belongs to
+        missing = ""
+        while candidate.stack[-1] != opener:
+            missing += _CLOSER[candidate.stack.pop()]
+        candidate.stack.pop()
+        candidate.edits.append((i, 0, missing))
+        candidate.repairs.append(f"inserted missing {missing!r}")
+    else:
+        candidate.edits.append((i, 1, ""))
+        candidate.repairs.append(f"removed stray {ch!r}")
+
+
+def _finish_balanced(text: str, candidate: _Candidate, end: int) -> ExtractionResult:
+    span = (candidate.start, end)
+    try:
+        value = _loads(candidate.apply(text, end))
+    except json.JSONDecodeError as e:
+        return ExtractionResult(repairs=candidate.repairs, span=span, error=f"Could not parse JSON: {e}")
+
+    repairs = list(candidate.repairs)
+    if text[:candidate.start].strip():
+        repairs.append(f"skipped {candidate.start} chars of leading text")
+    trailing = text[end:].strip()
+    if trailing:
+        repairs.append(f"ignored {len(trailing)} chars of trailing text")
+    return ExtractionResult(value, repairs, span)
+
+
+def _finish_truncated(text: str, candidate: _Candidate, string_start: int = None) -> ExtractionResult:
+    """Close an object cut off by the end of the text (usually max_new_tokens)"""
+    end = len(text)
+    suffix = ""
+    last = candidate.last
+
+    if string_start is not None:
+        # Drop a dangling escape such as a lone backslash or a partial \uXXXX
+        dangling = _DANGLING_ESCAPE.search(text, string_start + 1)
+        if dangling and len(dangling.group(1)) % 2 == 1:
+            end = dangling.start(1) + len(dangling.group(1)) - 1
+        suffix += '"'
+        candidate.repairs.append("closed unterminated string")
+        last = "key" if candidate.stack[-1] == "{" and last in ("{", ",") else "value"
+    else:
+        tail = text[candidate.last_pos + 1:]
+        scalar = tail.strip()
+        if scalar and last in (":", "[", ","):
+            completed = _complete_scalar(scalar)
+            candidate.edits.append((end - len(tail.lstrip()), len(scalar), completed))
+            if completed != scalar:
+                candidate.repairs.append(f"completed truncated value {scalar!r}")
+            last = "value"
+        elif scalar:
+            end = candidate.last_pos + 1
+
+    if last == "key":
+        suffix += ": null"
+        candidate.repairs.append("filled missing value with null")
+    elif last == ":":
+        suffix += "null"
+        candidate.repairs.append("filled missing value with null")
+    elif last == ",":
+        candidate.edits.append((candidate.last_pos, 1, ""))
+        candidate.repairs.append("removed trailing comma")
+
+    closers = "".join(_CLOSER[opener] for opener in reversed(candidate.stack))
+    suffix += closers
+    candidate.repairs.append(f"closed {len(closers)} open bracket{'s' if len(closers) != 1 else ''}")
+
+    span = (candidate.start, len(text))
+    try:
+        value = _loads(candidate.apply(text, end, suffix))
+    except json.JSONDecodeError as e:
+        return ExtractionResult(repairs=candidate.repairs, span=span, error=f"Could not parse JSON: {e}")
+    if text[:candidate.start].strip():
+        candidate.repairs.append(f"skipped {candidate.start} chars of leading text")
+    return ExtractionResult(value, candidate.repairs, span)
+
+
+def _complete_scalar(scalar: str) -> str:
+    for literal in ("true", "false", "null"):
+        if literal.startswith(scalar):
+            return literal
+    match = _PARTIAL_NUMBER.match(scalar)
+    return match.group() if match else "null"
+
+
+def format_output(raw_json: str):
+    """Parse model output into a registry item, repairing it when possible"""
+    result = extract_registry_item(raw_json)
+    if result.value is None:
+        return {"error": result.error, "raw_output": raw_json}
+    return result.value
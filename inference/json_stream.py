@@ -0,0 +1,145 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+WHITESPACE = " \t\r\n"
+
+
+class _Frame:
+    """An open object or array on the parser stack"""
+
+    __slots__ = ("container", "path", "expect_key", "key", "index")
+
+    def __init__(self, container, path: Tuple):
+        self.container = container
+        self.path = path
+        self.expect_key = isinstance(container, dict)
+        self.key = None
+        self.index = 0
+
+    def member_path(self) -> Tuple:
+        return self.path + ((self.key,) if isinstance(self.container, dict) else (self.index,))
+
+
+class IncrementalRegistryParser:
+    """Incrementally parse a streamed registry-item JSON object.
+
+    Text is fed in arbitrary chunks as tokens arrive. Every string, number or
+    literal is reported as soon as its closing character has been seen, and the
+    partially built document is available from ``snapshot`` at any time, so
+    ``name``, ``title`` and ``description`` can be shown long before the large
+    ``files[].content`` body has finished generating.
+
+    Anything before the first ``{`` and after the matching ``}`` is ignored.
+    Each character is looked at once, so the cost is linear in the output size.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.done = False
+        self._buf = []
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._token_start = None  # start of the current string or scalar
+        self._events: List[Tuple[Tuple, Any]] = []
+
+    def feed(self, chunk: str) -> List[Tuple[Tuple, Any]]:
+        """Consume a chunk and return the (path, value) pairs completed by it"""
+        self._events = []
+        if self.done or not chunk:
+            return self._events
+
+        buf = self._buf
+        start = len(buf)
+        buf.extend(chunk)
+        for pos in range(start, len(buf)):
+            self._step(buf[pos], pos)
+            if self.done:
+                break
+        return self._events
+
+    def snapshot(self) -> Optional[dict]:
+        """The document built so far (incomplete members are omitted)"""
+        return self.root
+
+    def _text(self, start: int, end: int) -> str:
+        return "".join(self._buf[start:end])
+
+    def _step(self, ch: str, pos: int):
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                text = self._text(self._token_start, pos + 1)
+                self._token_start = None
+                try:
+                    # strict=False accepts raw newlines and tabs inside strings, which models emit often
+                    value = json.loads(text, strict=False)
+                except json.JSONDecodeError:
+                    value = text[1:-1]  # e.g. an invalid escape such as \q; keep the raw body
+                frame = self._stack[-1]
+                if self._string_is_key:
+                    frame.key = value
+                else:
+                    self._complete(frame, value)
+            return
+
+        if not self._stack:
+            # Skip any chatter before the root object
+            if ch == "{":
+                self.root = {}
+                self._stack.append(_Frame(self.root, ()))
+            return
+
+        frame = self._stack[-1]
+        if self._token_start is not None and (ch in WHITESPACE or ch in ",}]"):
+            self._finish_scalar(frame, pos)
+
+        if ch in WHITESPACE:
+            return
+        if ch == '"':
+            self._in_string = True
+            self._token_start = pos
+            self._string_is_key = frame.expect_key
+        elif ch == ":":
+            frame.expect_key = False
+        elif ch == ",":
+            if isinstance(frame.container, dict):
+                frame.expect_key = True
+                frame.key = None
+            else:
+                frame.index += 1
+        elif ch in "{[":
+            child = {} if ch == "{" else []
+            self._attach(frame, child)
+            self._stack.append(_Frame(child, frame.member_path()))
+        elif ch in "}]":
+            self._stack.pop()
+            if not self._stack:
+                self.done = True
+        elif self._token_start is None:
+            self._token_start = pos
+
+    def _finish_scalar(self, frame: _Frame, pos: int):
+        text = self._text(self._token_start, pos)
+        self._token_start = None
+        try:
+            value = json.loads(text, strict=False)
+        except json.JSONDecodeError:
+            value = text
+        self._complete(frame, value)
+
+    def _attach(self, frame: _Frame, value):
+        if isinstance(frame.container, dict):
+            frame.container[frame.key] = value
+        else:
+            frame.container.append(value)
+
+    def _complete(self, frame: _Frame, value):
+        self._attach(frame, value)
+        self._events.append((frame.member_path(), value))
@@ -0,0 +1,188 @@
+"""Memory-mapped n-gram index over the tokenized training corpus.
+
+Built offline once per tokenizer, then opened read-only with mmap so several
+worker processes share the same pages:
+
+    python ngram_index.py --tokenizer ./shadcn-component-generator --out ngram.idx
+"""
+import argparse
+import json
+import mmap
+import struct
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+MAGIC = b"NGRM"
+VERSION = 1
+# magic, version, n, num_tokens, table_size
+HEADER = struct.Struct("<4sIIQQ")
+HEADER_SIZE = 32
+SEPARATOR = 0xFFFFFFFF  # between documents, never proposed as a draft token
+
+_FNV_OFFSET = 0xCBF29CE484222325
+_FNV_PRIME = 0x100000001B3
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+DEFAULT_DATASET = Path(__file__).resolve().parent.parent / "data/collection_scripts/data/processed/dataset.jsonl"
+
+
+def ngram_hash(ngram: Sequence[int]) -> int:
+    h = _FNV_OFFSET
+    for token in ngram:
+        h = ((h ^ token) * _FNV_PRIME) & _MASK64
+    return h or 1  # 0 marks an empty slot
+
+
+def build_index(documents: Iterable[List[int]], out_path: str, n: int = 3) -> Path:
+    """Write the token stream plus an open-addressing table of n-gram -> continuation offset"""
+    tokens = array("I")
+    first_seen: Dict[Tuple[int, ...], int] = {}
+    for doc in documents:
+        start = len(tokens)
+        tokens.extend(doc)
+        for i in range(start, len(tokens) - n):
+            first_seen.setdefault(tuple(tokens[i:i + n]), i + n)
+        tokens.append(SEPARATOR)
+
+    table_size = 1
+    while table_size < 2 * max(1, len(first_seen)):
+        table_size <<= 1
+    keys = array("Q", bytes(8 * table_size))
+    positions = array("I", bytes(4 * table_size))
+    for ngram, position in first_seen.items():
+        h = ngram_hash(ngram)
+        slot = h & (table_size - 1)
+        while keys[slot]:
+            slot = (slot + 1) & (table_size - 1)
+        keys[slot] = h
+        positions[slot] = position
+
+    path = Path(out_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n, len(tokens), table_size).ljust(HEADER_SIZE, b"\0"))
+        tokens.tofile(f)
+        if len(tokens) % 2:
+            f.write(b"\0" * 4)  # keep the 8-byte keys aligned
+        keys.tofile(f)
+        positions.tofile(f)
+    return path
+
+
+class NgramIndex:
+    """Read-only view of an index written by build_index"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file = self.path.open("rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.n, num_tokens, self.table_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not an n-gram index (version {VERSION})")
+
+        view = memoryview(self._mmap)
+        offset = HEADER_SIZE
+        self.tokens = view[offset:offset + 4 * num_tokens].cast("I")
+        offset += 4 * (num_tokens + num_tokens % 2)
+        self.keys = view[offset:offset + 8 * self.table_size].cast("Q")
+        offset += 8 * self.table_size
+        self.positions = view[offset:offset + 4 * self.table_size].cast("I")
+
+    def lookup(self, ngram: Sequence[int], k: int) -> List[int]:
+        """Up to k corpus tokens that followed this n-gram"""
+        if len(ngram) != self.n:
+            return []
+        h = ngram_hash(ngram)
+        mask = self.table_size - 1
+        slot = h & mask
+        while True:
+            key = self.keys[slot]
+            if key == 0:
+                return []
+            if key == h:
+                position = self.positions[slot]
+                if list(self.tokens[position - self.n:position]) == list(ngram):
+                    draft = []
+                    for token in self.tokens[position:position + k]:
+                        if token == SEPARATOR:
+                            break
+                        draft.append(token)
+                    return draft
+            slot = (slot + 1) & mask
+
+    def close(self):
+        for view in (self.tokens, self.keys, self.positions):
+            view.release()
+        self._mmap.close()
+        self._file.close()
+
+
+class NgramDrafter:
+    """Proposes draft tokens by prompt lookup first, then from the corpus index.
+
+    The running sequence (prompt plus generated tokens) is indexed as it grows, so
+    the in-context lookup costs O(max_ngram) per step instead of a rescan.
+    """
+
+    def __init__(self, index: Optional[NgramIndex] = None, max_ngram: int = 4, num_draft: int = 8):
+        self.index = index
+        self.max_ngram = max_ngram
+        self.num_draft = num_draft
+        self._context: List[int] = []
+        self._seen: Dict[Tuple[int, ...], int] = {}
+
+    def reset(self, prompt_ids: List[int]):
+        self._context = []
+        self._seen = {}
+        self.extend(prompt_ids)
+
+    def extend(self, token_ids: List[int]):
+        for token in token_ids:
+            self._context.append(token)
+            end = len(self._context)
+            # Record where each n-gram ending just before this token continued (latest wins)
+            for n in range(1, self.max_ngram + 1):
+                if end - 1 - n >= 0:
+                    self._seen[tuple(self._context[end - 1 - n:end - 1])] = end - 1
+
+    def propose(self) -> List[int]:
+        context = self._context
+        for n in range(min(self.max_ngram, len(context)), 0, -1):
+            position = self._seen.get(tuple(context[-n:]))
+            if position is not None:
+                draft = context[position:position + self.num_draft]
+                if draft:
+                    return draft
+        if self.index is not None and len(context) >= self.index.n:
+            return self.index.lookup(context[-self.index.n:], self.num_draft)
+        return []
+
+
+def iter_dataset_token_ids(tokenizer, dataset_path: Path):
+    """Tokenize every record of the processed dataset the same way the model saw it"""
+    with Path(dataset_path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield tokenizer(json.loads(line)["text"], add_special_tokens=False)["input_ids"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokenizer", required=True, help="model or tokenizer path")
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    parser.add_argument("--out", default="ngram.idx")
+    parser.add_argument("--n", type=int, default=3)
+    args = parser.parse_args()
+
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(args.tokenizer)
+    path = build_index(iter_dataset_token_ids(tokenizer, args.dataset), args.out, n=args.n)
+    index = NgramIndex(path)
+    print(f"✅ Indexed {len(index.tokens)} tokens ({index.table_size} slots, n={index.n}) into {path}")
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import torch
+from transformers import DynamicCache
+
+
+KV = Tuple[Tuple[torch.Tensor, torch.Tensor], ...]  # (key, value) per layer, [batch, heads, positions, head_dim]
+
+
+def _cache_layers(cache: DynamicCache) -> KV:
+    """Per-layer (key, value) tensors of a cache, across transformers versions"""
+    if isinstance(cache, tuple):  # transformers 4.x returns this form when no cache object was passed in
+        return cache
+    if hasattr(cache, "layers"):
+        return tuple((layer.keys, layer.values) for layer in cache.layers)
+    return tuple(zip(cache.key_cache, cache.value_cache))
+
+
+def _build_cache(kv: KV) -> DynamicCache:
+    cache = DynamicCache()
+    for layer_idx, (key, value) in enumerate(kv):
+        cache.update(key, value, layer_idx)
+    return cache
+
+
+class _Entry:
+    """KV of tokens[start:], on top of the entry ``parent`` that holds tokens[:start]"""
+
+    __slots__ = ("tokens", "kv", "pinned", "parent", "start", "children", "hits")
+
+    def __init__(self, tokens: Tuple[int, ...], kv: KV, pinned: bool, parent: Optional[int] = None, start: int = 0):
+        self.tokens = tokens
+        self.kv = kv
+        self.pinned = pinned
+        self.parent = parent
+        self.start = start
+        self.children = 0
+        self.hits = 0  # rows seen with this prefix since it was cached
+
+
+class PrefixKVCache:
+    """KV cache of shared prompt prefixes, keyed by a prefix tree over token blocks.
+
+    The tree is flattened into chained block hashes: the key of a prefix ending
+    at a block boundary is hash(parent key, block tokens), so walking a prompt
+    visits every ancestor prefix in O(prompt length). Registered prefixes are
+    pinned and may end mid-block. Other block-aligned prefixes are counted as
+    prompts go by. Once one is seen ``min_hits`` times, its KV is computed,
+    extending the longest cached ancestor, and kept under an LRU token budget.
+
+    A promoted entry only stores the KV past that ancestor and only those tokens
+    count against the budget. Entries that other entries extend are never
+    evicted, and neither is a prefix that more rows have shared than the one
+    being promoted, so one-off per-prompt prefixes cannot push out a preamble
+    that every prompt starts with.
+    """
+
+    def __init__(
+        self,
+        model,
+        block_size: int = 16,
+        max_tokens: int = 8192,
+        min_hits: int = 2,
+        max_tracked: int = 4096,
+    ):
+        self.model = model
+        self.block_size = block_size
+        self.max_tokens = max_tokens
+        self.min_hits = min_hits
+        self.max_tracked = max_tracked
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._counts: "OrderedDict[int, int]" = OrderedDict()
+        self._tail_lengths = set()  # lengths of registered prefixes past their last block boundary
+        self._cached_tokens = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "reused_tokens": 0, "promotions": 0, "evictions": 0}
+
+    def register(self, token_ids: Sequence[int]) -> int:
+        """Precompute and pin the KV of a static prefix; returns its length in tokens"""
+        tokens = tuple(token_ids)
+        if not tokens:
+            raise ValueError("cannot register an empty prefix")
+        with self._lock:
+            key = None
+            for key, length in self._walk(tokens, len(tokens), tails=False):
+                pass
+            boundary = len(tokens) - len(tokens) % self.block_size
+            parent = key if boundary else 0
+            if boundary < len(tokens):
+                key = hash((parent, tokens[boundary:]))
+                self._tail_lengths.add(len(tokens) - boundary)
+            entry = self._entries.get(key)
+            if entry is not None and entry.tokens == tokens:
+                if not entry.pinned:
+                    entry.pinned = True
+                    self._cached_tokens -= len(tokens) - entry.start
+                return len(tokens)
+            self._entries[key] = _Entry(tokens, self._compute(tokens), pinned=True)
+        return len(tokens)
+
+    def lookup(
+        self,
+        rows: List[List[int]],
+        namespace: Optional[str] = None,
+        forward_kwargs: Optional[Dict] = None,
+    ) -> Tuple[int, Optional[DynamicCache]]:
+        """Longest cached prefix shared by every row, as a cache expanded to the batch.
+
+        Also counts the rows' block prefixes, which may promote a new entry first.
+        At least one token of every row is left uncached so the model has logits to start from.
+        ``namespace`` separates prefixes whose KV differs for the same tokens (e.g. per LoRA
+        adapter); ``forward_kwargs`` are passed to the model when computing a promoted entry.
+        """
+        limit = min(len(row) for row in rows) - 1
+        root = hash(namespace) if namespace is not None else 0
+        with self._lock:
+            matches = [self._observe(tuple(row), limit, root, forward_kwargs or {}) for row in rows]
+            common = set(matches[0]).intersection(*matches[1:])
+            if not common:
+                self.stats["misses"] += len(rows)
+                return 0, None
+            key = max(common, key=lambda k: matches[0][k])
+            entry = self._entries[key]
+            self._entries.move_to_end(key)
+            self.stats["hits"] += len(rows)
+            self.stats["reused_tokens"] += len(entry.tokens) * len(rows)
+            kv = self._full_kv(key)
+        batch = len(rows)
+        # expand() is a view; the cache concatenates new positions into fresh tensors, so entries stay intact
+        expanded = tuple((k.expand(batch, -1, -1, -1), v.expand(batch, -1, -1, -1)) for k, v in kv)
+        return len(entry.tokens), _build_cache(expanded)
+
+    def clear(self):
+        with self._lock:
+            # Pinned entries are registered prefixes, which never extend another entry
+            self._entries = OrderedDict((k, e) for k, e in self._entries.items() if e.pinned)
+            for entry in self._entries.values():
+                entry.children = 0
+            self._counts.clear()
+            self._cached_tokens = 0
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries), "cached_tokens": self._cached_tokens}
+
+    # --------------------------
+    # Internals (caller holds the lock)
+    # --------------------------
+
+    def _walk(self, tokens: Tuple[int, ...], limit: int, tails: bool = True, root: int = 0):
+        """Yield (key, length) for every block-aligned prefix, plus registered tails, up to limit"""
+        key = root
+        for end in range(0, limit + 1, self.block_size):
+            if tails:
+                for tail in self._tail_lengths:
+                    if end + tail <= limit:
+                        yield hash((key, tokens[end:end + tail])), end + tail
+            if end + self.block_size > limit:
+                break
+            key = hash((key, tokens[end:end + self.block_size]))
+            yield key, end + self.block_size
+
+    def _observe(self, tokens: Tuple[int, ...], limit: int, root: int, forward_kwargs: Dict) -> Dict[int, int]:
+        """Cached prefixes of this row (key -> length), promoting its deepest frequent prefix"""
+        cached = {}
+        deepest = None
+        # Registered prefixes live in the default namespace only
+        for key, length in self._walk(tokens, min(limit, self.max_tokens), tails=root == 0, root=root):
+            entry = self._entries.get(key)
+            if entry is not None and entry.tokens == tokens[:length]:
+                cached[key] = length
+                entry.hits += 1
+            if length % self.block_size:
+                continue  # registered tails are not counted
+            count = self._counts.pop(key, 0) + 1
+            self._counts[key] = count
+            if count >= self.min_hits:
+                deepest = (key, length, count)
+        while len(self._counts) > self.max_tracked:
+            self._counts.popitem(last=False)
+
+        if deepest is not None and deepest[0] not in cached:
+            key, length, count = deepest
+            parent = max((k for k, n in cached.items() if n < length), key=cached.get, default=None)
+            start = cached[parent] if parent is not None else 0
+            if not self._make_room(length - start, protect=count, keep=parent):
+                return cached
+            entry = _Entry(
+                tokens[:length],
+                self._compute(tokens[:length], parent, forward_kwargs),
+                pinned=False,
+                parent=parent,
+                start=start,
+            )
+            entry.hits = 1
+            self._entries[key] = entry
+            if parent is not None:
+                self._entries[parent].children += 1
+            self._cached_tokens += length - start
+            self.stats["promotions"] += 1
+            cached[key] = length
+        return cached
+
+    def _make_room(self, tokens: int, protect: int, keep: Optional[int]) -> bool:
+        """Evict LRU leaves until ``tokens`` more fit; False (evicting nothing) if they cannot.
+
+        Entries seen in more rows than ``protect`` stay, as does ``keep`` (the new entry's parent).
+        """
+        if tokens > self.max_tokens:
+            return False
+        victims, freed = [], 0
+        needed = self._cached_tokens + tokens - self.max_tokens
+        for key, entry in self._entries.items():
+            if freed >= needed:
+                break
+            if entry.pinned or entry.children or key == keep or entry.hits > protect:
+                continue
+            victims.append(key)
+            freed += len(entry.tokens) - entry.start
+        if freed < needed:
+            # Halve the protection, so prefixes that stopped being used eventually give way
+            for entry in self._entries.values():
+                entry.hits //= 2
+            return False
+        for key in victims:
+            entry = self._entries.pop(key)
+            if entry.parent is not None:
+                self._entries[entry.parent].children -= 1
+            self._cached_tokens -= len(entry.tokens) - entry.start
+            self.stats["evictions"] += 1
+        return True
+
+    def _full_kv(self, key: int) -> KV:
+        """KV of an entry's whole prefix, joining the segments along its parent chain"""
+        segments = []
+        while key is not None:
+            entry = self._entries[key]
+            segments.append(entry.kv)
+            key = entry.parent
+        if len(segments) == 1:
+            return segments[0]
+        segments.reverse()
+        return tuple(
+            tuple(torch.cat([segment[layer][j] for segment in segments], dim=2) for j in (0, 1))
+            for layer in range(len(segments[0]))
+        )
+
+    @torch.no_grad()
+    def _compute(
+        self, tokens: Tuple[int, ...], parent: Optional[int] = None, forward_kwargs: Optional[Dict] = None
+    ) -> KV:
+        """KV of the tokens past the parent entry, computed on top of the parent's cached prefix"""
+        start = len(self._entries[parent].tokens) if parent is not None else 0
+        cache = _build_cache(self._full_kv(parent)) if parent is not None else DynamicCache()
+        input_ids = torch.tensor([tokens[start:]], device=self.model.device)
+        out = self.model(input_ids=input_ids, past_key_values=cache, use_cache=True, **(forward_kwargs or {}))
+        # Copies, so the entry does not keep the parent's positions alive through a view
+        return tuple((k[:, :, start:].clone(), v[:, :, start:].clone()) for k, v in _cache_layers(out.past_key_values))
@@ -0,0 +1,313 @@
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+SCHEMA_URL = "https://ui.shadcn.com/schema/registry-item.json"
+REGISTRY_TYPES = [
+    "registry:ui",
+    "registry:lib",
+    "registry:block",
+    "registry:component",
+    "registry:hook",
+    "registry:page",
+    "registry:file",
+    "registry:style",
+    "registry:theme",
+    "registry:example",
+]
+# shadcn needs an explicit install location for these file types
+TARGET_REQUIRED_TYPES = frozenset({"registry:file", "registry:page"})
+
+# The part of the registry-item schema this project emits. It is stricter than
+# upstream where training needs it: every item has files and every file has content.
+REGISTRY_ITEM_SCHEMA = {
+    "type": "object",
+    "required": ["name", "type", "files"],
+    "properties": {
+        "$schema": {"type": "string", "const": SCHEMA_URL},
+        "name": {"type": "string", "minLength": 1},
+        "type": {"type": "string", "enum": REGISTRY_TYPES},
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "dependencies": {"type": "array", "items": {"type": "string"}},
+        "registryDependencies": {"type": "array", "items": {"type": "string"}},
+        "files": {
+            "type": "array",
+            "minItems": 1,
+            "items": {
+                "type": "object",
+                "required": ["path", "content", "type"],
+                "properties": {
+                    "path": {"type": "string", "minLength": 1},
+                    "content": {"type": "string", "minLength": 1},
+                    "type": {"type": "string", "enum": REGISTRY_TYPES},
+                    "target": {"type": "string"},
+                },
+            },
+        },
+    },
+}
+
+# Error codes
+NOT_AN_OBJECT = "not_an_object"
+MISSING_KEY = "missing_key"
+WRONG_TYPE = "wrong_type"
+BAD_VALUE = "bad_value"  # not in the enum / not the expected constant
+EMPTY_VALUE = "empty_value"  # string or array below its minimum length
+UNSAFE_PATH = "unsafe_path"  # absolute, Windows-style or escaping with ..
+MISSING_TARGET = "missing_target"
+TARGET_MISMATCH = "target_mismatch"  # path and target name different files
+NAME_MISMATCH = "name_mismatch"  # single-file item whose file is not named after it
+ERROR_CODES = (
+    NOT_AN_OBJECT, MISSING_KEY, WRONG_TYPE, BAD_VALUE, EMPTY_VALUE,
+    UNSAFE_PATH, MISSING_TARGET, TARGET_MISMATCH, NAME_MISMATCH,
+)
+
+_TYPES = {"object": dict, "array": list, "string": str, "boolean": bool, "integer": int}
+_MISSING = object()
+_VALID = ()  # shared result for valid items, so the common case allocates nothing
+
+
+class Violation:
+    """One problem found in an item: a code from ERROR_CODES, a JSON pointer and a message"""
+
+    __slots__ = ("code", "path", "message")
+
+    def __init__(self, code: str, path: str, message: str):
+        self.code = code
+        self.path = path
+        self.message = message
+
+    def as_dict(self) -> Dict[str, str]:
+        return {"code": self.code, "path": self.path, "message": self.message}
+
+    def __repr__(self):
+        return f"Violation({self.code!r}, {self.path!r}, {self.message!r})"
+
+
+Check = Callable[[object, str, List[Violation]], bool]
+_KEYWORDS = {"type", "required", "properties", "items", "enum", "const", "minLength", "minItems"}
+
+
+def compile_schema(schema: Dict) -> Tuple[Callable[[object], bool], Check]:
+    """Compile a JSON schema into (accepts, check) closures, walking the schema once.
+
+    ``accepts(value)`` only answers valid or not and allocates nothing, which is
+    all that is needed for the common case. ``check(value, path, errors)`` finds
+    every violation with its JSON pointer, and only runs for rejected values.
+    Only the keywords REGISTRY_ITEM_SCHEMA uses are supported.
+    """
+    unsupported = set(schema) - _KEYWORDS
+    if unsupported:
+        raise ValueError(f"unsupported schema keywords: {sorted(unsupported)}")
+    return _compile_accepts(schema), _compile_check(schema)
+
+
+def _compile_accepts(schema: Dict) -> Callable[[object], bool]:
+    kind = schema.get("type")
+    expected = _TYPES[kind] if kind else object
+
+    if kind == "object":
+        required = tuple(schema.get("required", ()))
+        subschemas = schema.get("properties", {})
+        # Properties constrained by type alone are checked inline instead of through a closure
+        typed = tuple((key, _TYPES[sub["type"]]) for key, sub in subschemas.items() if set(sub) == {"type"})
+        properties = tuple((key, _compile_accepts(sub)) for key, sub in subschemas.items() if set(sub) != {"type"})
+
+        def accepts(value):
+            if type(value) is not dict:
+                return False
+            for key in required:
+                if key not in value:
+                    return False
+            for key, expected_type in typed:
+                item = value.get(key, expected_type)
+                if item is not expected_type and type(item) is not expected_type:
+                    return False
+            for key, accepts_property in properties:
+                item = value.get(key, _MISSING)
+                if item is not _MISSING and not accepts_property(item):
+                    return False
+            return True
+        return accepts
+
+    if kind == "array":
+        min_items = schema.get("minItems", 0)
+        accepts_item = _compile_accepts(schema.get("items", {}))
+
+        def accepts(value):
+            if type(value) is not list or len(value) < min_items:
+                return False
+            for item in value:
+                if not accepts_item(item):
+                    return False
+            return True
+        return accepts
+
+    # Leaves with a single constraint get the smallest closure that covers it
+    if len(set(schema) & {"enum", "const", "minLength"}) > 1:
+        check = _compile_check(schema)
+        return lambda value: check(value, "", [])
+    if "enum" in schema:
+        allowed = frozenset(schema["enum"])
+        return lambda value: type(value) is expected and value in allowed
+    if "const" in schema:
+        const = schema["const"]
+        return lambda value: type(value) is expected and value == const
+    if schema.get("minLength"):
+        min_length = schema["minLength"]
+        return lambda value: type(value) is expected and len(value) >= min_length
+    if kind is None:
+        return lambda value: True
+    return lambda value: type(value) is expected
+
+
+def _compile_check(schema: Dict) -> Check:
+    kind = schema.get("type")
+    expected = _TYPES[kind] if kind else None
+
+    if kind == "object":
+        required = tuple(schema.get("required", ()))
+        properties = tuple((key, _compile_check(sub)) for key, sub in schema.get("properties", {}).items())
+
+        def check(value, path, errors):
+            if type(value) is not dict:
+                errors.append(Violation(NOT_AN_OBJECT if not path else WRONG_TYPE, path, "expected an object"))
+                return False
+            ok = True
+            for key in required:
+                if key not in value:
+                    errors.append(Violation(MISSING_KEY, f"{path}/{key}", f"missing required key {key!r}"))
+                    ok = False
+            for key, check_property in properties:
+                item = value.get(key, _MISSING)
+                if item is not _MISSING and not check_property(item, f"{path}/{key}", errors):
+                    ok = False
+            return ok
+        return check
+
+    if kind == "array":
+        min_items = schema.get("minItems", 0)
+        check_item = _compile_check(schema["items"]) if "items" in schema else None
+
+        def check(value, path, errors):
+            if type(value) is not list:
+                errors.append(Violation(WRONG_TYPE, path, "expected an array"))
+                return False
+            ok = True
+            if len(value) < min_items:
+                errors.append(Violation(EMPTY_VALUE, path, f"expected at least {min_items} item(s)"))
+                ok = False
+            if check_item is not None:
+                for i, item in enumerate(value):
+                    if not check_item(item, f"{path}/{i}", errors):
+                        ok = False
+            return ok
+        return check
+
+    allowed = frozenset(schema["enum"]) if "enum" in schema else None
+    const = schema.get("const", _MISSING)
+    min_length = schema.get("minLength", 0)
+
+    def check(value, path, errors):
+        if expected is not None and type(value) is not expected:
+            errors.append(Violation(WRONG_TYPE, path, f"expected a {kind}"))
+            return False
+        if allowed is not None and value not in allowed:
+            errors.append(Violation(BAD_VALUE, path, f"{value!r} is not one of the allowed values"))
+            return False
+        if const is not _MISSING and value != const:
+            errors.append(Violation(BAD_VALUE, path, f"expected {const!r}"))
+            return False
+        if min_length and len(value) < min_length:
+            errors.append(Violation(EMPTY_VALUE, path, "must not be empty"))
+            return False
+        return True
+    return check
+
+
+def _unsafe(path: str) -> bool:
+    return path.startswith("/") or "\\" in path or ":" in path or (".." in path and ".." in path.split("/"))
+
+
+class RegistryValidator:
+    """Validates registry items against REGISTRY_ITEM_SCHEMA plus cross-field rules.
+
+    The schema is compiled once. Files that pass the schema are then checked for
+    safe relative paths, a target where shadcn needs one, a target naming the
+    same file as the path, and single-file items whose file is named after them.
+    """
+
+    def __init__(self, schema: Dict = REGISTRY_ITEM_SCHEMA):
+        self._accepts, self._check = compile_schema(schema)
+        self._lock = threading.Lock()
+        self.stats = Counter()  # items, invalid and one count per error code
+
+    def validate(self, item) -> Sequence[Violation]:
+        """All violations found in one parsed item; empty when it is valid"""
+        return self.validate_batch([item])[0]
+
+    def validate_batch(self, items: Iterable) -> List[Sequence[Violation]]:
+        """Violations per item, in order; error codes are tallied in ``stats``"""
+        accepts, check, check_files = self._accepts, self._check, self._check_files
+        results = []
+        counts = Counter()
+        for item in items:
+            errors = []
+            if not accepts(item):
+                check(item, "", errors)
+            if type(item) is dict and type(item.get("files")) is list:
+                check_files(item, errors)
+            if errors:
+                counts.update(error.code for error in errors)
+                counts["invalid"] += 1
+                results.append(errors)
+            else:
+                results.append(_VALID)
+        counts["items"] = len(results)
+        with self._lock:
+            self.stats.update(counts)
+        return results
+
+    def filter(self, items: Sequence) -> Tuple[List, List[Tuple[object, Sequence[Violation]]]]:
+        """Split items into (valid, [(invalid item, violations), ...])"""
+        valid, rejected = [], []
+        for item, errors in zip(items, self.validate_batch(items)):
+            if errors:
+                rejected.append((item, errors))
+            else:
+                valid.append(item)
+        return valid, rejected
+
+    @staticmethod
+    def _check_files(item: Dict, errors: List[Violation]):
+        """Cross-field rules, for every file that has a non-empty string path"""
+        files = item["files"]
+        for i, file in enumerate(files):
+            if type(file) is not dict:
+                continue
+            path = file.get("path")
+            if type(path) is not str or not path:
+                continue
+            if _unsafe(path):
+                errors.append(Violation(UNSAFE_PATH, f"/files/{i}/path", f"{path!r} must be a relative path"))
+            target = file.get("target")
+            if target is None:
+                file_type = file.get("type")
+                if file_type in TARGET_REQUIRED_TYPES:
+                    errors.append(Violation(MISSING_TARGET, f"/files/{i}/target", f"{file_type} files need a target"))
+            elif type(target) is str:
+                if _unsafe(target):
+                    errors.append(Violation(UNSAFE_PATH, f"/files/{i}/target", f"{target!r} must be a relative path"))
+                elif target.rpartition("/")[2] != path.rpartition("/")[2]:
+                    errors.append(Violation(
+                        TARGET_MISMATCH, f"/files/{i}/target", f"{target!r} is not the same file as {path!r}"
+                    ))
+            if len(files) == 1:
+                name = item.get("name")
+                filename = path.rpartition("/")[2]
+                stem = filename.rpartition(".")[0] or filename
+                if type(name) is str and stem != name:
+                    errors.append(Violation(
+                        NAME_MISMATCH, "/files/0/path", f"file {stem!r} does not match name {name!r}"
+                    ))
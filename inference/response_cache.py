@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+DEFAULT_CACHE_PATH = Path(os.getenv("RESPONSE_CACHE_PATH", Path.home() / ".cache" / "shadcn-generator" / "responses.sqlite"))
+
+_PUNCTUATION = re.compile(r"[^\w\s:/.-]+")
+_WHITESPACE = re.compile(r"\s+")
+# An article on its own, or a request verb with the article optional ("create marquee")
+_LEADING_FILLER = re.compile(r"^(please\s+)?((create|generate|make|build)\s+(me\s+)?((an?|the)\s+)?|(an?|the)\s+)")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse cosmetic differences so near-identical prompts share a cache entry.
+
+    "A horizontal scrolling marquee with pauseOnHover" and
+    "  horizontal scrolling Marquee with pauseOnHover! " normalise to the same key,
+    as do "Create a marquee" and "create marquee".
+    """
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    text = _PUNCTUATION.sub(" ", text)
+    text = _WHITESPACE.sub(" ", text).strip(" .-")
+    return _LEADING_FILLER.sub("", text)
+
+
+def _percentile_ms(samples, pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] * 1000
+
+
+class ResponseCache:
+    """Two-tier response cache with in-flight request coalescing.
+
+    The memory tier is an LRU of the most recent entries. The disk tier is a
+    SQLite file that survives restarts and evicts by TTL and by total size,
+    least recently used first. When a key is already being generated, later
+    callers wait for that result instead of starting their own generation.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_CACHE_PATH,
+        memory_items: int = 1024,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.memory_items = memory_items
+        self.ttl = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # key -> (value, created)
+        self._inflight: Dict[str, Future] = {}
+        self._started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+        # Recent latencies in seconds for percentile metrics
+        self._hit_latency = deque(maxlen=1024)
+        self._miss_latency = deque(maxlen=1024)
+
+        self._db = None
+        if path:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, "
+                "accessed REAL NOT NULL, size INTEGER NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    @staticmethod
+    def make_key(prompt: str, params: Dict, model_fingerprint: str) -> str:
+        payload = json.dumps(
+            {"prompt": normalize_prompt(prompt), "params": params, "model": model_fingerprint},
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # --------------------------
+    # Lookup / store
+    # --------------------------
+
+    def acquire(self, key: str) -> Optional[str]:
+        """Return the cached value, waiting on an in-flight generation for the same key.
+
+        Returns None when the caller now owns the key. The owner must call
+        release() with the generated value, or None if generation failed.
+        """
+        while True:
+            start = time.perf_counter()
+            with self._lock:
+                value = self._get_locked(key)
+                if value is not None:
+                    self._hit_latency.append(time.perf_counter() - start)
+                    return value
+                future = self._inflight.get(key)
+                if future is None:
+                    self._inflight[key] = Future()
+                    self._started[key] = start
+                    self._counters["misses"] += 1
+                    return None
+                self._counters["coalesced"] += 1
+
+            value = future.result()
+            if value is not None:
+                with self._lock:
+                    self._hit_latency.append(time.perf_counter() - start)
+                return value
+            # The owner failed; try to become the owner ourselves
+
+    def release(self, key: str, value: Optional[str]):
+        with self._lock:
+            future = self._inflight.pop(key, None)
+            started = self._started.pop(key, None)
+            if started is not None:
+                self._miss_latency.append(time.perf_counter() - started)
+            if value is not None:
+                self._put_locked(key, value)
+        if future is not None:
+            future.set_result(value)
+
+    def get_or_compute(self, key: str, compute: Callable[[], str]) -> str:
+        value = self.acquire(key)
+        if value is not None:
+            return value
+        try:
+            value = compute()
+        except Exception:
+            self.release(key, None)
+            raise
+        self.release(key, value)
+        return value
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            c = dict(self._counters)
+            hits = c["memory_hits"] + c["disk_hits"] + c["coalesced"]
+            lookups = hits + c["misses"]
+            c.update(
+                hit_rate=hits / lookups if lookups else 0.0,
+                hit_p50_ms=_percentile_ms(self._hit_latency, 50),
+                hit_p95_ms=_percentile_ms(self._hit_latency, 95),
+                miss_p50_ms=_percentile_ms(self._miss_latency, 50),
+                miss_p95_ms=_percentile_ms(self._miss_latency, 95),
+                memory_entries=len(self._memory),
+                inflight=len(self._inflight),
+            )
+            if self._db is not None:
+                count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+                c.update(disk_entries=count, disk_bytes=size)
+        return c
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # --------------------------
+    # Internals (caller holds the lock)
+    # --------------------------
+
+    def _get_locked(self, key: str) -> Optional[str]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            value, created = entry
+            if now - created <= self.ttl:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return value
+            del self._memory[key]
+
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        if now - created > self.ttl:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._counters["evictions"] += 1
+            return None
+        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self._remember(key, value, created)
+        self._counters["disk_hits"] += 1
+        return value
+
+    def _put_locked(self, key: str, value: str):
+        now = time.time()
+        self._remember(key, value, now)
+        if self._db is None:
+            return
+        size = len(value.encode("utf-8"))
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses (key, value, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+            (key, value, now, now, size),
+        )
+        self._evict_disk(now)
+
+    def _remember(self, key: str, value: str, created: float):
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now: float):
+        expired = self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,)).rowcount
+        self._counters["evictions"] += max(0, expired)
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        # Drop least recently used rows until back under budget
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_disk_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self._counters["evictions"] += 1
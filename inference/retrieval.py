@@ -0,0 +1,287 @@
+"""Hybrid BM25 + hashed-embedding index over scraped registry items.
+
+Built by the data pipeline (data/collection_scripts/build_index.py) and opened
+here with numpy memory maps. Lookups only score the documents that share a
+word with the query, so their cost follows the postings read rather than the
+catalogue size (p50 0.18 ms at 50k components in bench_retrieval.py). Queries
+made only of words most components contain still score the whole catalogue.
+"""
+import hashlib
+import json
+import math
+import mmap
+import re
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+INDEX_VERSION = 1
+
+# Field weights for BM25 term frequencies: names and titles matter more than code
+FIELD_WEIGHTS = {"name": 3.0, "title": 2.0, "description": 1.0, "content": 0.3}
+MAX_CONTENT_CHARS = 4000
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Weight of the dense cosine in the hybrid score; the rest goes to normalised BM25
+DENSE_WEIGHT = 0.5
+
+_CAMEL = re.compile(r"([a-z0-9])([A-Z])")
+_WORD = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "the", "with", "and", "or", "for", "of", "to", "in", "on", "like",
+    "create", "generate", "make", "build", "ui", "component", "components", "please", "me",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words, splitting camelCase and kebab-case (pauseOnHover -> pause on hover)"""
+    return [w for w in _WORD.findall(_CAMEL.sub(r"\1 \2", text).lower()) if w not in STOPWORDS]
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """Signed feature hashing of words and character trigrams, L2-normalised"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in tokenize(text):
+        features = [(word, 1.0)]
+        padded = f"#{word}#"
+        features += [(padded[i:i + 3], 0.5) for i in range(len(padded) - 2)]
+        for feature, weight in features:
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % dim] += weight if (h >> 31) & 1 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def item_fields(item: Dict) -> Dict[str, str]:
+    files = item.get("files") or [{}]
+    return {
+        "name": item.get("name", "").replace("-", " "),
+        "title": item.get("title", ""),
+        "description": item.get("description", ""),
+        "content": (files[0].get("content") or "")[:MAX_CONTENT_CHARS],
+    }
+
+
+def build_component_index(items: Iterable[Dict], out_dir: str, dim: int = 64) -> Path:
+    """Write postings, embeddings and the stored items for a list of {prompt, completion} records"""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    vocab: Dict[str, int] = {}
+    doc_terms: List[Counter] = []
+    embeddings = []
+    lengths = []
+    offsets = [0]
+    seen = set()
+    with (out / "items.jsonl").open("wb") as f:
+        for record in items:
+            item = json.loads(record["completion"])
+            fields = item_fields(item)
+            if item.get("name") in seen:
+                continue
+            seen.add(item.get("name"))
+
+            tf = Counter()
+            for field, text in fields.items():
+                for term in tokenize(text):
+                    tf[vocab.setdefault(term, len(vocab))] += FIELD_WEIGHTS[field]
+            doc_terms.append(tf)
+            lengths.append(sum(tf.values()))
+            embeddings.append(embed(" ".join([fields["name"], fields["title"], fields["description"]]), dim))
+
+            line = (json.dumps({"prompt": record.get("prompt", ""), "completion": record["completion"]}) + "\n").encode("utf-8")
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+
+    num_docs = len(doc_terms)
+    avg_len = sum(lengths) / max(1, num_docs)
+    doc_freq = Counter(term for tf in doc_terms for term in tf)
+
+    # BM25 contributions do not depend on the query, so store them precomputed per posting
+    postings = [[] for _ in range(len(vocab))]
+    for doc_id, tf in enumerate(doc_terms):
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[doc_id] / avg_len)
+        for term, freq in tf.items():
+            idf = math.log(1 + (num_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            postings[term].append((doc_id, idf * freq * (BM25_K1 + 1) / (freq + norm)))
+
+    term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    term_offsets[1:] = np.cumsum([len(p) for p in postings])
+    post_docs = np.fromiter((d for p in postings for d, _ in p), dtype=np.int32, count=int(term_offsets[-1]))
+    post_scores = np.fromiter((s for p in postings for _, s in p), dtype=np.float32, count=int(term_offsets[-1]))
+    term_max = np.array([max((s for _, s in p), default=0.0) for p in postings], dtype=np.float32)
+
+    np.save(out / "term_offsets.npy", term_offsets)
+    np.save(out / "post_docs.npy", post_docs)
+    np.save(out / "post_scores.npy", post_scores)
+    np.save(out / "term_max.npy", term_max)
+    np.save(out / "embeddings.npy", np.stack(embeddings) if embeddings else np.zeros((0, dim), dtype=np.float32))
+    np.save(out / "item_offsets.npy", np.array(offsets, dtype=np.int64))
+    (out / "meta.json").write_text(json.dumps({
+        "version": INDEX_VERSION,
+        "num_docs": num_docs,
+        "dim": dim,
+        "vocab": vocab,
+    }), encoding="utf-8")
+    return out
+
+
+class Match:
+    __slots__ = ("doc_id", "score", "prompt", "completion")
+
+    def __init__(self, doc_id: int, score: float, prompt: str, completion: str):
+        self.doc_id = doc_id
+        self.score = score
+        self.prompt = prompt
+        self.completion = completion
+
+    def __repr__(self):
+        return f"Match(doc_id={self.doc_id}, score={self.score:.3f})"
+
+
+class ComponentIndex:
+    """Read-only hybrid index; arrays are memory-mapped, only the vocabulary lives in memory"""
+
+    def __init__(self, index_dir: str):
+        self.path = Path(index_dir)
+        meta = json.loads((self.path / "meta.json").read_text(encoding="utf-8"))
+        if meta["version"] != INDEX_VERSION:
+            raise ValueError(f"{index_dir}: index version {meta['version']}, expected {INDEX_VERSION}")
+        self.vocab = meta["vocab"]
+        self.num_docs = meta["num_docs"]
+        self.dim = meta["dim"]
+
+        # Plain ndarray views of the maps: slicing a np.memmap costs a Python call per access
+        load = lambda name: np.asarray(np.load(self.path / name, mmap_mode="r"))
+        self.term_offsets = load("term_offsets.npy")
+        self.post_docs = load("post_docs.npy")
+        self.post_scores = load("post_scores.npy")
+        self.term_max = load("term_max.npy")
+        self.embeddings = load("embeddings.npy")
+        self.item_offsets = load("item_offsets.npy")
+        # Items are read by byte range from a shared map, which is safe across handler threads
+        self._items_file = (self.path / "items.jsonl").open("rb")
+        self._items = mmap.mmap(self._items_file.fileno(), 0, access=mmap.ACCESS_READ) if self.num_docs else b""
+
+        digest = hashlib.sha256()
+        for name in sorted(p.name for p in self.path.iterdir()):
+            stat = (self.path / name).stat()
+            digest.update(f"{name}:{stat.st_size}:{int(stat.st_mtime)}".encode())
+        self.fingerprint = digest.hexdigest()[:16]
+
+    def search(self, query: str, k: int = 3) -> List[Match]:
+        """Top-k items by hybrid score in [0, 1].
+
+        Candidates are the documents in the postings of the query terms, read
+        highest term_max first. Reading stops once a document outside them could
+        not reach the top k even with a perfect dense score. Only candidates get
+        a dense score. Queries with no known term, or whose postings would cover
+        a large share of the catalogue, score every document instead.
+        """
+        if not self.num_docs:
+            return []
+        q = embed(query, self.dim)
+        terms = sorted(
+            {self.vocab[term] for term in tokenize(query) if term in self.vocab},
+            key=lambda term_id: -self.term_max[term_id],
+        )
+        best_possible = float(sum(self.term_max[term_id] for term_id in terms))
+        if not best_possible:
+            return self._search_all(q, [], 0.0, k)
+
+        bm25_weight = (1 - DENSE_WEIGHT) / best_possible
+        docs = np.empty(0, dtype=np.int32)  # sorted, like the postings
+        scores = np.empty(0, dtype=np.float32)
+        remaining = best_possible
+        for i, term_id in enumerate(terms):
+            if len(docs) >= k and DENSE_WEIGHT + bm25_weight * remaining <= np.partition(scores, -k)[-k]:
+                break
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            if len(docs) + end - start > self.num_docs // 8:
+                # Merging and gathering that many rows costs more than scoring every document
+                return self._search_all(q, terms, bm25_weight, k)
+            remaining -= float(self.term_max[term_id])
+            new, bm25 = self.post_docs[start:end], self.post_scores[start:end]
+            if len(docs):
+                pos = np.searchsorted(docs, new)
+                fresh = docs[np.minimum(pos, len(docs) - 1)] != new
+                new, bm25, pos = new[fresh], bm25[fresh], pos[fresh]
+                if not len(new):
+                    continue
+            # New docs are in none of the postings read before, so only later terms need a lookup
+            bm25 = bm25 + self._bm25(new, terms[i + 1:])
+            new_scores = DENSE_WEIGHT * np.maximum(self.embeddings[new] @ q, 0) + bm25_weight * bm25
+            if len(docs):
+                docs, scores = np.insert(docs, pos, new), np.insert(scores, pos, new_scores)
+            else:
+                docs, scores = new, new_scores
+        return self._top(docs, scores, k)
+
+    def _search_all(self, q: np.ndarray, terms: List[int], bm25_weight: float, k: int) -> List[Match]:
+        bm25 = np.zeros(self.num_docs, dtype=np.float32)
+        for term_id in terms:
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            # Each document appears once per term, so fancy-index addition is safe
+            bm25[self.post_docs[start:end]] += self.post_scores[start:end]
+        scores = DENSE_WEIGHT * np.maximum(self.embeddings @ q, 0) + bm25_weight * bm25
+        return self._top(np.arange(self.num_docs), scores, k)
+
+    def _bm25(self, docs: np.ndarray, terms: List[int]) -> np.ndarray:
+        """Summed BM25 contributions of the terms for each doc; postings are sorted by doc id"""
+        bm25 = np.zeros(len(docs), dtype=np.float32)
+        for term_id in terms:
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            posting = self.post_docs[start:end]
+            pos = np.minimum(np.searchsorted(posting, docs), len(posting) - 1)
+            hit = posting[pos] == docs
+            bm25[hit] += self.post_scores[start:end][pos[hit]]
+        return bm25
+
+    def _top(self, docs: np.ndarray, scores: np.ndarray, k: int) -> List[Match]:
+        k = min(k, len(docs))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self._match(int(docs[i]), float(scores[i])) for i in top]
+
+    def _match(self, doc_id: int, score: float) -> Match:
+        start, end = int(self.item_offsets[doc_id]), int(self.item_offsets[doc_id + 1])
+        record = json.loads(self._items[start:end])
+        return Match(doc_id, score, record["prompt"], record["completion"])
+
+    def close(self):
+        if self.num_docs:
+            self._items.close()
+        self._items_file.close()
+
+
+def format_few_shot(matches: List[Match]) -> str:
+    """Render retrieved items in the training format to prepend to the prompt"""
+    return "".join(f"<|prompt|>{m.prompt}<|completion|>{m.completion}<|endoftext|>" for m in matches)
+
+
+class RetrievalRouter:
+    """Decides per prompt whether to serve a stored item or to add few-shot context"""
+
+    def __init__(self, index: ComponentIndex, serve_threshold: float = 0.8, few_shot: int = 1, min_few_shot_score: float = 0.2):
+        self.index = index
+        self.serve_threshold = serve_threshold
+        self.few_shot = few_shot
+        self.min_few_shot_score = min_few_shot_score
+        self.stats = {"served": 0, "few_shot": 0, "no_match": 0}
+
+    def route(self, prompt: str, serve: bool = True) -> Tuple[Optional[str], str]:
+        """Return (stored completion or None, few-shot context for the model).
+
+        With ``serve=False`` a close match is only used as few-shot context, for
+        requests whose output must come from the model (e.g. a style adapter).
+        """
+        matches = self.index.search(prompt, k=max(1, self.few_shot))
+        if serve and matches and matches[0].score >= self.serve_threshold:
+            self.stats["served"] += 1
+            return matches[0].completion, ""
+        examples = [m for m in matches[: self.few_shot] if m.score >= self.min_few_shot_score]
+        self.stats["few_shot" if examples else "no_match"] += 1
+        return None, format_few_shot(examples)
@@ -0,0 +1,99 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+import torch
+from transformers import DynamicCache
+
+from constrained import TokenFSM
+from ngram_index import NgramDrafter
+
+
+def _argmax(logits: torch.Tensor, fsm: Optional[TokenFSM], state: int, remaining: int) -> int:
+    if fsm is not None:
+        mask = fsm.mask(state, remaining, logits.shape[-1], logits.device)
+        logits = logits.masked_fill(~mask, float("-inf"))
+    return int(torch.argmax(logits))
+
+
+@torch.no_grad()
+def speculative_generate(
+    model,
+    input_ids: torch.Tensor,
+    max_new_tokens: int,
+    drafter: NgramDrafter,
+    eos_token_id: int,
+    fsm: Optional[TokenFSM] = None,
+    should_stop: Optional[Callable[[List[int]], bool]] = None,
+    past_key_values: Optional[DynamicCache] = None,
+    forward_kwargs: Optional[Dict] = None,
+) -> Tuple[List[int], Dict]:
+    """Greedy decoding for one sequence with n-gram draft tokens verified in a single pass.
+
+    Each step feeds the last accepted token plus the drafter's proposal through
+    the model in one forward pass. The longest draft prefix that matches the
+    model's own argmax is kept, plus the model's next token after it, and the KV
+    cache is cropped back to the accepted length. Only drafts that greedy
+    decoding would have produced are ever kept, so the output is identical to
+    ``generate(do_sample=False)``. When ``fsm`` is given, the same
+    registry-item masks as RegistryItemLogitsProcessor apply at every verified
+    position.
+    """
+    stats = {"forward_passes": 1, "drafted": 0, "accepted": 0}
+    prompt_ids = input_ids[0].tolist()
+    drafter.reset(prompt_ids)
+
+    # A cache passed in already holds the KV of a shared prompt prefix
+    cache = past_key_values if past_key_values is not None else DynamicCache()
+    forward_kwargs = forward_kwargs or {}  # e.g. adapter_names for a LoRA adapter
+    out = model(
+        input_ids=input_ids[:, cache.get_seq_length():], past_key_values=cache, use_cache=True, **forward_kwargs
+    )
+    cache = out.past_key_values
+    cache_len = input_ids.shape[1]
+
+    state = fsm.start if fsm is not None else 0
+    token = _argmax(out.logits[0, -1], fsm, state, max_new_tokens)
+    generated = [token]
+    drafter.extend([token])
+    if fsm is not None:
+        state = fsm.next_state(state, token)
+
+    while len(generated) < max_new_tokens and token != eos_token_id:
+        if should_stop is not None and should_stop(generated):
+            break
+
+        draft = drafter.propose()[: max_new_tokens - len(generated) - 1]
+        block = [token] + draft
+        out = model(
+            input_ids=torch.tensor([block], device=input_ids.device),
+            past_key_values=cache,
+            use_cache=True,
+            **forward_kwargs,
+        )
+        cache = out.past_key_values
+        stats["forward_passes"] += 1
+        stats["drafted"] += len(draft)
+
+        # Position i predicts the token after block[:i + 1]; stop at the first disagreement
+        logits = out.logits[0]
+        new_tokens = []
+        for i in range(len(block)):
+            remaining = max_new_tokens - len(generated) - len(new_tokens)
+            predicted = _argmax(logits[i], fsm, state, remaining)
+            new_tokens.append(predicted)
+            if fsm is not None:
+                state = fsm.next_state(state, predicted)
+            if predicted == eos_token_id or i >= len(draft) or draft[i] != predicted:
+                break
+
+        accepted = len(new_tokens) - 1
+        stats["accepted"] += accepted
+        cache_len += 1 + accepted
+        cache.crop(cache_len)
+
+        generated.extend(new_tokens)
+        drafter.extend(new_tokens)
+        token = generated[-1]
+
+    if eos_token_id in generated:
+        generated = generated[: generated.index(eos_token_id)]
+    return generated[:max_new_tokens], stats
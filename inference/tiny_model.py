@@ -0,0 +1,112 @@
+import json
+from pathlib import Path
+from typing import List
+
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, decoders, trainers
+from transformers import LlamaConfig, LlamaForCausalLM, PreTrainedTokenizerFast
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent.parent / "data/collection_scripts/data/processed/dataset.jsonl"
+SPECIAL_TOKENS = ["<pad>", "<|endoftext|>", "<|prompt|>", "<|completion|>"]
+
+# Prompts shared by the benchmarks; the first four are the usual short set
+BENCH_PROMPTS = [
+    "A horizontal scrolling marquee with pauseOnHover",
+    "A 3D card component with perspective effects",
+    "An animated toggle switch with accessibility support",
+    "Create a tooltip component with smooth animations",
+    "Create a badge component with different variants and sizes",
+    "Create a progress bar component with customizable styling",
+]
+# Phrased like the dataset prompts, so they hit its n-grams
+DATASET_PROMPTS = [
+    "Generate a UI component like Marquee",
+    "Generate a UI component like Border Beam",
+]
+
+
+def load_corpus_texts(corpus_path: Path = DEFAULT_CORPUS) -> List[str]:
+    """Read the "text" field of every record in the processed dataset"""
+    texts = []
+    if corpus_path.exists():
+        with corpus_path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    texts.append(json.loads(line)["text"])
+    if not texts:
+        # Keep the benchmarks runnable from a fresh clone without the processed data
+        texts = ['<|prompt|>Generate a UI component like Marquee<|completion|>{"name": "marquee"}<|endoftext|>']
+    return texts
+
+
+def rss_mb(field: str = "VmRSS") -> float:
+    """Resident memory of this process in MB; VmHWM is its peak so far"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def build_tiny_tokenizer(texts: List[str], vocab_size: int = 512) -> PreTrainedTokenizerFast:
+    """Train a small byte-level BPE tokenizer offline on the given texts"""
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=vocab_size,
+        special_tokens=SPECIAL_TOKENS,
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+    )
+    tokenizer.train_from_iterator(texts, trainer=trainer)
+
+    return PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        pad_token="<pad>",
+        eos_token="<|endoftext|>",
+        additional_special_tokens=["<|prompt|>", "<|completion|>"],
+    )
+
+
+def build_tiny_model(
+    vocab_size: int = 512,
+    hidden_size: int = 64,
+    num_layers: int = 2,
+    seed: int = 0,
+    corpus_path: Path = DEFAULT_CORPUS,
+):
+    """Build a randomly initialised LLaMA-architecture model and tokenizer for CPU benchmarks"""
+    torch.manual_seed(seed)
+    tokenizer = build_tiny_tokenizer(load_corpus_texts(corpus_path), vocab_size=vocab_size)
+
+    config = LlamaConfig(
+        vocab_size=len(tokenizer),
+        hidden_size=hidden_size,
+        intermediate_size=hidden_size * 2,
+        num_hidden_layers=num_layers,
+        num_attention_heads=4,
+        num_key_value_heads=4,
+        max_position_embeddings=4096,
+        pad_token_id=tokenizer.pad_token_id,
+        eos_token_id=tokenizer.eos_token_id,
+    )
+    model = LlamaForCausalLM(config)
+    model.eval()
+    return model, tokenizer
+
+
+def save_tiny_model(output_dir: str, **kwargs) -> Path:
+    """Build a tiny model and save it so it can be loaded like a real checkpoint"""
+    model, tokenizer = build_tiny_model(**kwargs)
+    path = Path(output_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return path
+
+
+if __name__ == "__main__":
+    import sys
+
+    out = save_tiny_model(sys.argv[1] if len(sys.argv) > 1 else "./tiny-random-llama")
+    print(f"✅ Tiny random model saved to {out}")